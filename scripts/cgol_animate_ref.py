@@ -2,17 +2,50 @@ import pygame
 import numpy as np
 import sys
 import argparse
-import os
 from scipy.signal import convolve2d
 import matplotlib
 matplotlib.use('Qt5Agg')
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
+from PIL import Image
+from cgol_swar_engine import cgol_swar_engine
+from cgol_gen_cache import cgol_gen_cache
+from cgol_hashlife_engine import cgol_hashlife_engine
+from cgol_tiled_engine import cgol_tiled_engine
+from cgol_sparse_engine import cgol_sparse_engine
+from cgol_lut_engine import cgol_lut_engine
+from cgol_pygame_render import cgol_grid_renderer
+from cgol_pattern_loader import load_pattern_bits, load_pattern_rule
+from cgol_rule import get_rule
+from cgol_bit_grid import cgol_bit_grid, bit_grid_from_dense, display_shape, downsample
+from cgol_frame_export import cgol_frame_export, export_fmt, grid_frame, show_grid_lines
 
 #------------------------------------------------------------------------------------
 
 # Invocation Example: 
 # Cloud: python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py cgol_64x64_edna -itr 1001 -wrap
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py cgol_64x64_edna -itr 100001 -wrap -fftl -engine swar
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py big_4096x4096 -itr 1000 -wrap -fftl -engine swar -threads 8
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py big_4096x4096 -itr 1000 -wrap -fftl -engine sparse
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py big_16384x16384 -itr 1000 -wrap -fftl -engine swar -tblock 0
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_animate_ref.py cgol_64x64_edna -itr 100000 -wrap -engine swar -export edna.mp4 -export_every 50
+
+# Grids beyond GRID_MAX_WIDTH x GRID_MAX_HEIGHT (the hardware maximum, sw/cgol_shared_lib.h) are held
+# bit-packed (cgol_bit_grid, rows*cols/8 bytes) and stepped by the swar engine, the display downsamples them.
+# The sparse engine (1 byte per cell while stepping) suits large mostly empty grids.
+
+#------------------------------------------------------------------------------------
+
+# Preallocated working buffers of cgol_animate.step_into
+class cgol_step_scratch :
+
+    def __init__(self, rows, cols):
+
+        self.padded = np.zeros((rows+2, cols+2), dtype=np.uint8) # Grid with halo (torus opposite edge or dead cells)
+        self.vert   = np.empty((rows, cols+2), dtype=np.uint8)   # Column sums of 3 rows
+        self.index  = np.empty((rows, cols), dtype=np.uint8)     # Rule lookup index 9*state + neighbors
+        self.center = np.empty((rows, cols), dtype=np.uint8)     # 8*state
+        self.next   = np.empty((rows, cols), dtype=np.uint32)    # Rule mask shifted by index
 
 #------------------------------------------------------------------------------------
 
@@ -35,12 +68,32 @@ class cgol_animate :
         self.rows = None
         self.cols = None
         
-        self.get_start_pic()
+        self.bit_grid = False # Grid held bit-packed (beyond hardware maximum size)
+        
+        self.engine = None # None is the default convolution engine
+        self.cache  = None # Optional persistent generation cache
+        self.next_checkpoint = None # Next cache checkpoint generation while running
         
-        self.CELL_SIZE = int(640/max(self.GRID_WIDTH,self.GRID_HEIGHT))
+        self.step_bufs    = None # conv engine uint8 ping-pong grids while running generations (step_into)
+        self.step_scratch = None
         
-        self.WINDOW_WIDTH  = self.CELL_SIZE * self.GRID_WIDTH
-        self.WINDOW_HEIGHT = self.CELL_SIZE * self.GRID_HEIGHT + 30  # extra space for text
+        if getattr(self.args, 'start_grid', None) is not None : # Already parsed start grid (e.g. shared by regression workers)
+            self.set_start_grid(self.args.start_grid)
+        else :
+            self.get_start_pic()
+        self.init_rule()
+        self.init_engine()
+        
+        if (getattr(self.args, 'cache', None) is not None) and self.bit_grid :
+            print('Generation cache is not supported for bit-packed grids, ignored.')
+        elif getattr(self.args, 'cache', None) is not None :
+            self.cache = cgol_gen_cache(self.args.cache, getattr(self.args, 'cache_interval', 4096), getattr(self.args, 'cache_max_mb', 512))
+        
+        # Grids larger than the window are downsampled to DISP_HEIGHT x DISP_WIDTH displayed cells
+        self.CELL_SIZE, self.DISP_HEIGHT, self.DISP_WIDTH = display_shape(self.GRID_HEIGHT, self.GRID_WIDTH, 640)
+        
+        self.WINDOW_WIDTH  = self.CELL_SIZE * self.DISP_WIDTH
+        self.WINDOW_HEIGHT = self.CELL_SIZE * self.DISP_HEIGHT + 30  # extra space for text
         self.FPS = self.args.fps
         
         # Colors        
@@ -48,84 +101,224 @@ class cgol_animate :
         self.BG_COLOR    = (  0,   0,  80)   # Dark blue background
         self.ALIVE_COLOR = (255, 255,   0)   # Bright yellow live cells
         self.TEXT_COLOR  = (200, 200, 200)
+        
+        self.renderer = None # Blit based grid renderer, created on first draw
                 
     #------------------------------------------------------------------------------------
  
     def get_start_pic (self) :
     
-       K5_SW_APPS_PATH = os.environ["K5_SW_APPS"].replace('/c/','c:/')
-       pic_file = open(K5_SW_APPS_PATH + '/cgol_shared_lib/cgol_patterns/' + self.args.pic + '.txt','r')
-
-       self.start_grid = np.zeros((self.GRID_MAX_HEIGHT, self.GRID_MAX_WIDTH), dtype=int)
-
-       total_elements = 0 
-       row_idx = 0
-       for orig_line_count, line in enumerate(pic_file) :
-         col_idx = 0
-         row_present = False
-         for p in line[:-1] : # exclude eol
-             if p in ['#','.'] :
-                 total_elements +=1
-                 row_present = True             
-                 if p=='#'  : 
-                    self.start_grid[row_idx][col_idx] = 1
-             col_idx+=1    
-             
-         if row_present:
-           row_idx+=1
-         
-       if len(line.split())>0 :
-         orig_line_count+=1
-                     
-       width = total_elements//orig_line_count
-                      
-       self.GRID_HEIGHT = orig_line_count
-       self.GRID_WIDTH  = width
-
-       self.start_grid = self.start_grid[:self.GRID_HEIGHT, :self.GRID_WIDTH]
-                 
-       pic_file.close()
-       
+       start_grid = load_pattern_bits(self.args.pic)
+       if (start_grid.rows > self.GRID_MAX_HEIGHT) or (start_grid.cols > self.GRID_MAX_WIDTH) :
+          self.set_start_grid(start_grid)
+       else :
+          self.set_start_grid(start_grid.to_dense())
+
+    #------------------------------------------------------------------------------------
+
+    def set_start_grid (self, start_grid) :
+
+       if not isinstance(start_grid, cgol_bit_grid) :
+          start_grid = np.asarray(start_grid, dtype=int)
+          if (start_grid.shape[0] > self.GRID_MAX_HEIGHT) or (start_grid.shape[1] > self.GRID_MAX_WIDTH) :
+             start_grid = bit_grid_from_dense(start_grid)
+
+       self.bit_grid = isinstance(start_grid, cgol_bit_grid)
+       self.start_grid = start_grid
+       self.GRID_HEIGHT, self.GRID_WIDTH = self.start_grid.shape
        self.grid =self.create_grid()
 
     #------------------------------------------------------------------------------------
 
     # Initialize grid
     def create_grid(self):
-         return self.start_grid[:][:]
+         return self.start_grid if self.bit_grid else self.start_grid[:][:]
     
     #------------------------------------------------------------------------------------
         
+    # Rule from args.rule, else the pattern's own rule (RLE header), else Conway's B3/S23
+    def init_rule(self):
+
+        rule = getattr(self.args, 'rule', None)
+        if (rule is None) and (getattr(self.args, 'start_grid', None) is None) :
+            rule = load_pattern_rule(self.args.pic)
+
+        self.rule = get_rule(rule)
+        self.rule_lut = self.rule.lut.astype(int) # Next state lookup of update_grid (same dtype as the grid)
+
+        if not self.rule.is_conway :
+            print('Checker rule %s' % self.rule)
+
+    #------------------------------------------------------------------------------------
+        
     # Update grid based on rules
     def update_grid(self,grid):
                   
         kernel = np.array([[1, 1, 1],
-                           [1, 0, 1],
+                           [1, 9, 1],
                            [1, 1, 1]])
         
-        # Count neighbors using 2D convolution
+        # Rule lookup index 9*state + neighbors using 2D convolution
         if self.args.wrap :
-           neighbors = convolve2d(grid, kernel, mode='same', boundary='wrap')
+           index = convolve2d(grid, kernel, mode='same', boundary='wrap')
         else :
-           neighbors = convolve2d(grid, kernel, mode='same', boundary='fill', fillvalue=0)
-        
-        # Apply Conway's Game of Life rules
-        birth = (grid == 0) & (neighbors == 3)
-        survive = (grid == 1) & ((neighbors == 2) | (neighbors == 3))
+           index = convolve2d(grid, kernel, mode='same', boundary='fill', fillvalue=0)
         
-        # Return the next generation
-        return np.where(birth | survive, 1, 0)        
+        # Apply the rule, return the next generation
+        return self.rule_lut[index]
             
     #------------------------------------------------------------------------------------
 
-    # Update grid based on rules
-    def update_grid_num_itr(self):
+    # Select the stepping engine, 'conv' (default) steps the dense grid by update_grid.
+    def init_engine(self):
+
+        if self.bit_grid and self.args.engine not in ('swar','sparse','lut') : # Engines stepping the bit-packed grid
+            if self.args.engine == 'hashlife' :
+                raise ValueError('hashlife engine does not support grids beyond %dx%d, use swar' % (self.GRID_MAX_HEIGHT, self.GRID_MAX_WIDTH))
+            print('Grid %dx%d beyond %dx%d, using swar engine.' % (self.GRID_HEIGHT, self.GRID_WIDTH, self.GRID_MAX_HEIGHT, self.GRID_MAX_WIDTH))
+            self.args.engine = 'swar'
+
+        if self.args.engine == 'swar' :
+            self.engine = cgol_swar_engine(self.GRID_HEIGHT, self.GRID_WIDTH, self.args.wrap, self.rule)
+            threads = getattr(self.args, 'threads', 1)
+            tblock = getattr(self.args, 'tblock', 1)
+            if (threads > 1) or (tblock != 1) : # Step horizontal bands in parallel, tblock generations per halo exchange
+                self.engine = cgol_tiled_engine(self.engine, threads, gens_per_exchange=tblock)
+                if self.engine.gens_per_exchange > 1 :
+                    print('Temporal blocking: %d bands, %d generations per halo exchange.' % (self.engine.num_bands, self.engine.gens_per_exchange))
+        elif self.args.engine == 'hashlife' :
+            self.engine = cgol_hashlife_engine(self.GRID_HEIGHT, self.GRID_WIDTH, self.args.wrap, getattr(self.args, 'hl_max_nodes', 4000000), self.rule)
+        elif self.args.engine == 'sparse' :
+            self.engine = cgol_sparse_engine(self.GRID_HEIGHT, self.GRID_WIDTH, self.args.wrap,
+                                             getattr(self.args, 'sparse_tile', 16), getattr(self.args, 'sparse_max_active', 0.5), self.rule)
+        elif self.args.engine == 'lut' :
+            self.engine = cgol_lut_engine(self.GRID_HEIGHT, self.GRID_WIDTH, self.args.wrap, self.rule)
+        elif self.args.engine != 'conv' :
+            raise ValueError('Unknown engine %s' % self.args.engine)
+
+    #------------------------------------------------------------------------------------
+
+    # Advance uint8 grid src by a single generation into dst, without grid sized allocations:
+    # neighborhood sums are accumulated in the preallocated scratch buffers (numpy out=) and
+    # the rule table is applied as a bit mask shift (a table gather would convert the index to intp).
+    # src and dst must not overlap.
+    def step_into(self, src, dst, scratch):
+
+        padded = scratch.padded
+        padded[1:-1, 1:-1] = src
+        if self.args.wrap : # Halo rows then columns (corners get the diagonal opposite cell)
+            padded[0, 1:-1]  = src[-1]
+            padded[-1, 1:-1] = src[0]
+            padded[:, 0]  = padded[:, -2]
+            padded[:, -1] = padded[:, 1]
+
+        vert  = scratch.vert
+        index = scratch.index
+        np.add(padded[:-2], padded[1:-1], out=vert)
+        np.add(vert, padded[2:], out=vert)
+        np.add(vert[:, :-2], vert[:, 1:-1], out=index)
+        np.add(index, vert[:, 2:], out=index)
+        np.left_shift(src, 3, out=scratch.center)
+        np.add(index, scratch.center, out=index)
+
+        np.right_shift(self.rule.lut_mask, index, out=scratch.next)
+        np.bitwise_and(scratch.next, 1, out=scratch.next)
+        dst[:] = scratch.next
+
+    #------------------------------------------------------------------------------------
+
+    # Allocate (start) or release (stop) the conv engine ping-pong grids used by step_state
+    def start_step_buffers(self):
+        self.step_bufs = [np.zeros((self.GRID_HEIGHT, self.GRID_WIDTH), dtype=np.uint8) for i in range(2)]
+        self.step_scratch = cgol_step_scratch(self.GRID_HEIGHT, self.GRID_WIDTH)
+
+    def stop_step_buffers(self):
+        self.step_bufs = None
+        self.step_scratch = None
+
+    #------------------------------------------------------------------------------------
+
+    # Convert dense grid to the engine state representation
+    def pack_grid(self, grid):
+        if self.engine is not None :
+            return self.engine.pack(grid)
+        if self.step_bufs is not None :
+            self.step_bufs[0][:] = grid
+            return self.step_bufs[0]
+        return grid
+
+    #------------------------------------------------------------------------------------
+
+    # Convert engine state representation back to dense grid (or bit grid)
+    def unpack_grid(self, state):
+        if self.bit_grid :
+            return self.engine.unpack_bits(state)
+        if self.engine is not None :
+            return self.engine.unpack(state)
+        return state.astype(int) if self.step_bufs is not None else state
+
+    #------------------------------------------------------------------------------------
+
+    # Advance engine state by a single generation.
+    # With conv ping-pong buffers the result overwrites the buffer of the previous state.
+    def step_state(self, state):
+        if self.engine is not None :
+            return self.engine.step(state)
+        if self.step_bufs is not None :
+            dst = self.step_bufs[1] if state is self.step_bufs[0] else self.step_bufs[0]
+            self.step_into(state, dst, self.step_scratch)
+            return dst
+        return self.update_grid(state)
+
+    #------------------------------------------------------------------------------------
+
+    # Advance engine state by num_gen generations, temporal blocking engines step them in blocks
+    def step_states(self, state, num_gen):
+        if hasattr(self.engine, 'step_n') :
+            return self.engine.step_n(state, num_gen)
+        for i in range(num_gen) :
+            state = self.step_state(state)
+        return state
+
+    # Generations per cycle detection step, the temporal block of the engine (one halo exchange)
+    def step_stride(self):
+        return getattr(self.engine, 'gens_per_exchange', 1)
+
+    #------------------------------------------------------------------------------------
+
+    # Advance dense grid by a single generation using the selected engine
+    def update_grid_engine(self, grid):
+        return self.unpack_grid(self.step_state(self.pack_grid(grid)))
+
+    #------------------------------------------------------------------------------------
+
+    # Compact bit-packed copy of engine state, compared directly (no hash) for cycle detection
+    def state_key(self, state):
+        return state.tobytes() if self.engine is not None else np.packbits(state.astype(np.uint8, copy=False)).tobytes()
+
+    #------------------------------------------------------------------------------------
+
+    # Store a cache checkpoint at regular generation intervals, at the first generation at or past
+    # each interval multiple (stepping strides may not divide the interval)
+    def store_checkpoint(self, cache_key, gen, state):
+        if (cache_key is not None) and (gen >= self.next_checkpoint) :
+            self.cache.store(cache_key, gen, self.unpack_grid(state))
+            self.next_checkpoint = (gen // self.cache.interval + 1) * self.cache.interval
+
+    #------------------------------------------------------------------------------------
+
+    # Run generations start_gen..itr, fast-forwarding on a repeated grid hash.
+    # Grids are compared every step_stride generations (a repeat after any multiple of the period is still a repeat).
+    def run_itr_hash(self, state, start_gen, cache_key):
     
+        stride = self.step_stride()
         seen = {}
-        gen = 0 ;
-        for gen in range(self.args.itr) : 
+        gen = start_gen
+        while gen + stride <= self.args.itr : 
+        
+            self.store_checkpoint(cache_key, gen, state)
         
-            h = hash(self.grid.tobytes())
+            h = hash(state.tobytes())
             if h in seen:
                 loop_start = seen[h]
                 loop_length = gen - loop_start
@@ -134,30 +327,121 @@ class cgol_animate :
                 ff_base_itr = remaining-fast_forward
                 print('Checker Repeated grid detected at generation %d, fast-forwarding %d generations.\n' % (gen,ff_base_itr))
                 
-                for ff_i in range(fast_forward):
-                   self.grid = self.update_grid(self.grid)                    
-                break
+                return self.step_states(state, fast_forward)
  
             seen[h] = gen
-            self.grid = self.update_grid(self.grid)
+            state = self.step_states(state, stride)
+            gen += stride
+            
+        return self.step_states(state, self.args.itr - gen) # Generations short of a whole stride
+
+    #------------------------------------------------------------------------------------
+
+    # Run generations start_gen..itr with Brent's cycle detection.
+    # Only two compact states are kept (constant memory), a detected period is confirmed
+    # by stepping one more full period and comparing grids before fast-forwarding.
+    # Grids are compared every step_stride generations, finding a multiple of the period.
+    def run_itr_brent(self, state, start_gen, cache_key):
+    
+        stride = self.step_stride()
+        power = 1
+        lam = 1
+        tortoise = self.state_key(state)
+        
+        gen = start_gen
+        while gen + stride <= self.args.itr :
+        
+            self.store_checkpoint(cache_key, gen, state)
+            
+            state = self.step_states(state, stride)
+            gen += stride
+            key = self.state_key(state)
+            
+            if key == tortoise : # state at gen equals state at gen-lam*stride
+            
+                period = lam * stride
+                verify_state = state
+                if self.step_bufs is not None : # Verification stepping reuses the ping-pong buffers
+                    state = state.copy()
+                verify_state = self.step_states(verify_state, period)
+                   
+                if self.state_key(verify_state) != key :
+                    print('Checker period %d at generation %d failed verification, continuing without fast-forward.\n' % (period,gen))
+                    tortoise = key
+                    power = lam = 1
+                    continue
+                    
+                remaining = self.args.itr - gen
+                fast_forward = remaining % period
+                ff_base_itr = remaining-fast_forward
+                print('Checker Repeated grid (period %d verified) detected at generation %d, fast-forwarding %d generations.\n' % (period,gen,ff_base_itr))
+                
+                return self.step_states(state, fast_forward)
+                
+            if power == lam : # start a new power of two search window
+                tortoise = key
+                power *= 2
+                lam = 0
+            lam += 1
+            
+        return self.step_states(state, self.args.itr - gen) # Generations short of a whole stride
+
+    #------------------------------------------------------------------------------------
+
+    # Update grid based on rules
+    def update_grid_num_itr(self):
+    
+        start_gen = 0
+        cache_key = None
+        if self.cache is not None : # Resume from nearest cached checkpoint
+            cache_key = self.cache.key(self.start_grid, self.args.wrap, self.rule.text)
+            start_gen, cached_grid = self.cache.nearest(cache_key, self.args.itr, self.start_grid.shape)
+            if cached_grid is not None :
+                self.grid = cached_grid
+                print('Checker resuming from cached generation %d.\n' % start_gen)
+            self.next_checkpoint = (start_gen // self.cache.interval + 1) * self.cache.interval
+        
+        if self.engine is None : # Allocation free conv stepping
+            self.start_step_buffers()
+        
+        state = self.pack_grid(self.grid)
+        
+        if self.args.engine == 'hashlife' : # Jump directly to generation itr
+            state = self.engine.advance(state, self.args.itr - start_gen)
+            print('Checker HashLife node cache: %s\n' % ', '.join('%s %d' % kv for kv in self.engine.stats().items()))
+        elif getattr(self.args, 'cycle', 'hash') == 'brent' :
+            state = self.run_itr_brent(state, start_gen, cache_key)
+        else :
+            state = self.run_itr_hash(state, start_gen, cache_key)
+            
+        self.grid = self.unpack_grid(state)
+        self.stop_step_buffers()
+        
+        if (cache_key is not None) and (start_gen != self.args.itr) :
+            self.cache.store(cache_key, self.args.itr, self.grid)
             
         print('Checker: done %d Generations ...' % self.args.itr, flush=True)
             
     #------------------------------------------------------------------------------------
     
+    # Dense grid as displayed, downsampled (any alive cell per block) when larger than the window
+    def display_grid(self, grid):
+        if isinstance(grid, cgol_bit_grid) :
+            if grid.shape == (self.DISP_HEIGHT, self.DISP_WIDTH) :
+                return grid.to_dense()
+            return grid.downsample(self.DISP_HEIGHT, self.DISP_WIDTH)
+        if grid.shape != (self.DISP_HEIGHT, self.DISP_WIDTH) :
+            return downsample(grid, self.DISP_HEIGHT, self.DISP_WIDTH)
+        return grid
+            
+    #------------------------------------------------------------------------------------
+    
     # Draw grid and cells
     def draw_grid(self,screen, grid):
-        for y in range(self.GRID_HEIGHT):
-            for x in range(self.GRID_WIDTH):
-                color = self.ALIVE_COLOR if grid[y, x] == 1 else self.BG_COLOR
-                rect = pygame.Rect(x*self.CELL_SIZE, y * self.CELL_SIZE + 30, self.CELL_SIZE, self.CELL_SIZE)
-                pygame.draw.rect(screen, color, rect)
-    
-        # Draw grid lines
-        for x in range(0, self.GRID_WIDTH * self.CELL_SIZE, self.CELL_SIZE):
-            pygame.draw.line(screen, self.GRID_COLOR, (x, 30), (x, self.WINDOW_HEIGHT))
-        for y in range(30, self.GRID_HEIGHT * self.CELL_SIZE + 30, self.CELL_SIZE):
-            pygame.draw.line(screen, self.GRID_COLOR, (0, y), (self.WINDOW_WIDTH, y))
+        if self.renderer is None :
+            self.renderer = cgol_grid_renderer(self.DISP_HEIGHT, self.DISP_WIDTH, self.CELL_SIZE, 30,
+                                               self.BG_COLOR, self.ALIVE_COLOR, self.GRID_COLOR)
+        self.renderer.draw(screen, self.display_grid(grid))
             
     #------------------------------------------------------------------------------------
     
@@ -171,37 +455,16 @@ class cgol_animate :
 
     def save_grid_img(self,thread_id,grid,img_filename):
 
-        # Save a Conway Game of Life grid using Pygame rendering.
+        # Save a Conway Game of Life grid image (headless, palette frame straight from the grid).
                                       
-        cell_color = (255, 255,  0) # Alive cell color
-        bg_color   = (  0,   0, 80) # background
-        grid_color = ( 40,  40, 40) # grid lines
-                
-        cell_size = self.CELL_SIZE
-              
         rows, cols = grid.shape
         self.rows = rows
         self.cols = cols
-        width, height = cols * cell_size, rows * cell_size
-    
-        pygame.init()
-        surface = pygame.Surface((width, height))
-        surface.fill(bg_color)
     
-        for y in range(rows):
-            for x in range(cols):
-                if grid[y, x] == 1:
-                    rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
-                    pygame.draw.rect(surface, cell_color, rect)
-
-        # Draw grid lines
-        for x in range(0, cols * cell_size, cell_size):
-            pygame.draw.line(surface, grid_color, (x,0), (x, height))
-        for y in range(0, height, cell_size):
-            pygame.draw.line(surface, grid_color, (0,y), (width, y))
-    
-        pygame.image.save(surface, img_filename)
-        pygame.quit()
+        frame = grid_frame(self.display_grid(grid), self.CELL_SIZE, grid_lines=show_grid_lines(self.CELL_SIZE))
+        img = Image.frombytes('P', (frame.shape[1], frame.shape[0]), frame.tobytes())
+        img.putpalette(list(self.BG_COLOR) + list(self.ALIVE_COLOR) + list(self.GRID_COLOR))
+        img.save(img_filename)
         print(f"Saved grid to {img_filename}")
 
     #------------------------------------------------------------------------------------
@@ -276,10 +539,12 @@ class cgol_animate :
 
         self.update_grid_num_itr()
 
+        grid = self.grid.to_dense() if self.bit_grid else self.grid
+
         match = True
         for r in range(self.GRID_HEIGHT):
           for c in range(self.GRID_WIDTH):
-            if (self.grid[r,c] != checked_grid[r,c]) :
+            if (grid[r,c] != checked_grid[r,c]) :
               match=False
               break
           if not match :
@@ -295,6 +560,38 @@ class cgol_animate :
                            
     #------------------------------------------------------------------------------------
     
+    # Headless export of every export_every-th generation up to itr (no display)
+    def export_frames(self):
+
+        fmt = self.args.export_fmt if self.args.export_fmt is not None else export_fmt(self.args.export)
+        exporter = cgol_frame_export(self.args.export, fmt, self.CELL_SIZE, self.BG_COLOR, self.ALIVE_COLOR, self.GRID_COLOR,
+                                     fps=self.FPS, grid_lines=show_grid_lines(self.CELL_SIZE))
+        every = max(1, self.args.export_every)
+
+        if self.engine is None : # Allocation free conv stepping
+            self.start_step_buffers()
+
+        generation = 0
+        state = self.pack_grid(self.grid)
+        exporter.add_frame(self.display_grid(self.grid), generation)
+
+        try :
+            while generation < self.args.itr :
+                num_gen = min(every, self.args.itr - generation)
+                if isinstance(self.engine, cgol_hashlife_engine) : # jump straight to the next exported generation
+                    state = self.engine.advance(state, num_gen)
+                else :
+                    state = self.step_states(state, num_gen)
+                generation += num_gen
+                self.grid = self.unpack_grid(state)
+                exporter.add_frame(self.display_grid(self.grid), generation)
+                print('Exported %d Generations ...' % generation, end='\r', flush=True)
+        finally :
+            exporter.close()
+            self.stop_step_buffers()
+
+    #------------------------------------------------------------------------------------
+    
     # Main function
     def animate(self):
                 
@@ -306,8 +603,12 @@ class cgol_animate :
         
         while running :
                 
-            if (self.args.fftl) and (generation < self.args.itr) : 
-                self.grid = self.update_grid(self.grid)
+            if (self.args.fftl) and (self.cache is not None) and (generation==0) and (self.args.itr > 0) : # jump via cached checkpoints
+                self.update_grid_num_itr()
+                generation = self.args.itr
+                
+            elif (self.args.fftl) and (generation < self.args.itr) : 
+                self.grid = self.update_grid_engine(self.grid)
                 generation += 1
                 print('Done %d Generations ...' % generation, end='\r', flush=True)
 
@@ -336,7 +637,7 @@ class cgol_animate :
                    paused = True
                 
                 if not paused:
-                    self.grid =self.update_grid(self.grid)
+                    self.grid =self.update_grid_engine(self.grid)
                     generation += 1
                     
                 screen.fill(self.BG_COLOR)
@@ -358,9 +659,33 @@ if __name__ == "__main__":
     ap.add_argument('-fps', metavar='<gen_per_sec>' , type=int, default=10 , help='Frames (generations) per second')     
     ap.add_argument('-wrap' , action='store_true', help='Wrap Mode')  
     ap.add_argument('-fftl' , action='store_true', help='fast forward to last')    
+    ap.add_argument('-cache', metavar='<dir>', type=str, default=None, help='Persistent generation cache directory')
+    ap.add_argument('-cache_interval', metavar='<num_itr>', type=int, default=4096, help='Generations between cached checkpoints')
+    ap.add_argument('-cache_max_mb', metavar='<mb>', type=int, default=512, help='Cache size bound (MB), least recently used evicted')
+    ap.add_argument('-cycle', metavar='<mode>', type=str, default='hash', choices=['hash','brent'],
+                    help='Cycle detection: hash (dict of all generation hashes) or brent (constant memory, verified period)')
+    ap.add_argument('-engine', metavar='<engine>', type=str, default='conv', choices=['conv','swar','hashlife','sparse','lut'],
+                    help='Stepping engine: conv (scipy convolution), swar (bit-packed uint64 rows), hashlife (memoized quadtree, wrap only),\n'
+                         'sparse (only tiles near last generation changes, for mostly empty grids) or lut (4x4 -> 2x2 block table)')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default=None,
+                    help='Life-like rule in B/S notation, e.g. B36/S23 (HighLife), default the pattern RLE rule or B3/S23')
+    ap.add_argument('-threads', metavar='<num_threads>', type=int, default=1, help='Tiled multi-core stepping threads (swar engine)')
+    ap.add_argument('-tblock', metavar='<num_gen>', type=int, default=1,
+                    help='Temporal blocking (swar engine): generations per band halo exchange, 0 chooses bands and generations from the L2 cache size')
+    ap.add_argument('-sparse_tile', metavar='<num_cells>', type=int, default=16, help='Sparse engine tile size (cells per side)')
+    ap.add_argument('-sparse_max_active', metavar='<fraction>', type=float, default=0.5, help='Sparse engine active tiles fraction above which a dense step is done')
+    ap.add_argument('-hl_max_nodes', metavar='<num_nodes>', type=int, default=4000000, help='HashLife node cache cap, tables are garbage collected above it')
+    ap.add_argument('-export', metavar='<path>', type=str, default=None,
+                    help='Headless export instead of animation: PNG sequence directory, .gif, or video file (.mp4, ... encoded by ffmpeg)')
+    ap.add_argument('-export_every', metavar='<num_itr>', type=int, default=1, help='Export every num_itr-th generation')
+    ap.add_argument('-export_fmt', metavar='<fmt>', type=str, default=None, choices=['png','gif','ffmpeg'],
+                    help='Export format (default inferred from the export path)')
     
     args = ap.parse_args()
 
     anim = cgol_animate(args)
     
-    anim.animate()
+    if args.export is not None :
+        anim.export_frames()
+    else :
+        anim.animate()
@@ -1,5 +1,6 @@
 import os
 import sys
+import numpy as np
 
 if 'K5_ENV' in os.environ : # RC3 case
   sys.path.append(os.environ['K5_ENV']+'/py')
@@ -13,41 +14,97 @@ import cgol_animate_ref as sar
 
 #-------------------------------------------------------------------------------------    
 
+# Read num_bytes of grid memory starting at self.grid_soc_addr into a bytes buffer.
+# Uses a single block transfer when the k5 session provides read_tcm_block(mem_id,addr,num_words),
+# otherwise one read_tcm per 32-bit word (host can access only 'word aligned').
+
+def read_grid_bytes(self,num_bytes) :
+
+       mem_id = XMEM if (self.grid_soc_addr >= XSPACE_BASE_ADDR) else DMEM ;
+       byte_ofst = int(self.grid_soc_addr) % 4
+       ramAddr = int(self.grid_soc_addr) - byte_ofst
+       num_words = (byte_ofst + num_bytes + 3) // 4
+
+       read_tcm_block = getattr(self.k5s, 'read_tcm_block', None)
+       if read_tcm_block is not None :
+          words = read_tcm_block(mem_id, ramAddr, num_words)
+       else :
+          words = [self.k5s.read_tcm(mem_id, ramAddr + 4*word_i) for word_i in range(num_words)]
+
+       buf = np.asarray(words, dtype=np.uint32).astype('<u4').tobytes()
+       return buf[byte_ofst:byte_ofst+num_bytes]
+
+#-------------------------------------------------------------------------------------    
+
+# Publish read back grid bytes of generation itr to the shared memory grid buffer self.shm_grid
+# (cgol_shm_grid), if the class has one, for out-of-process viewers and checker.
+
+def publish_grid_bytes(self,buf,itr) :
+
+       shm_grid = getattr(self, 'shm_grid', None)
+       if shm_grid is not None :
+          shm_grid.write(buf, itr if itr is not None else shm_grid.gen()+1)
+
+#-------------------------------------------------------------------------------------    
+
+# Read back the grid into the shared memory grid buffer only (no decode, rendered out of process).
+
+def publish_grid(self,itr) :
+
+       publish_grid_bytes(self, read_grid_bytes(self,(self.rows*self.cols + 7) // 8), itr)
+
+#-------------------------------------------------------------------------------------    
+
 # Get the grid array (used by all animate methods)
+# Grid cells are a contiguous bit stream, 1 bit per cell LSB first (see sw/bit_array.h).
+
+def get_grid(self,np_grid,itr=None) :
+
+       num_cells = self.rows*self.cols
+       num_bytes = (num_cells + 7) // 8
+
+       buf = read_grid_bytes(self,num_bytes)
+       publish_grid_bytes(self,buf,itr)
+       bits = np.unpackbits(np.frombuffer(buf, dtype=np.uint8), bitorder='little')
+
+       np_grid[:self.rows,:self.cols] = bits[:num_cells].reshape(self.rows,self.cols)
+
+#-------------------------------------------------------------------------------------    
+
+# Incremental get_grid for live animation.
+# The grid is read as row-sized chunks which are compared against the previous frame chunks,
+# only changed rows are decoded into np_grid (which must hold the previously read frame).
+# Returns the changed rows boolean mask (all rows on first call).
+
+def get_grid_dirty(self,np_grid,itr=None) :
+
+       num_cells = self.rows*self.cols
+       num_bytes = (num_cells + 7) // 8
+
+       raw_buf = read_grid_bytes(self,num_bytes)
+       publish_grid_bytes(self,raw_buf,itr)
+       buf = np.frombuffer(raw_buf, dtype=np.uint8)
+
+       if (self.cols % 8) == 0 : # Byte aligned rows, compare raw row bytes
+          row_chunks = buf.reshape(self.rows, self.cols//8)
+       else : # Rows not byte aligned, compare decoded rows
+          row_chunks = np.unpackbits(buf, bitorder='little')[:num_cells].reshape(self.rows,self.cols)
+
+       if (self.prev_grid_chunks is None) or (self.prev_grid_chunks.shape != row_chunks.shape) :
+          changed = np.ones(self.rows, dtype=bool)
+       else :
+          changed = np.any(row_chunks != self.prev_grid_chunks, axis=1)
+
+       self.prev_grid_chunks = row_chunks
+
+       if changed.any() :
+          if (self.cols % 8) == 0 :
+             np_grid[changed,:self.cols] = np.unpackbits(row_chunks[changed], axis=1, bitorder='little')
+          else :
+             np_grid[changed,:self.cols] = row_chunks[changed]
+
+       return changed
 
-def get_grid(self,np_grid) :
-
-       num_bytes = self.rows*self.cols 
-                  
-       mem_id = XMEM if (self.grid_soc_addr >= XSPACE_BASE_ADDR) else DMEM ;            
-       byteAddr = self.grid_soc_addr
-         
-       prev_ram_addr = -1     
-       r,c,cnt = 0,0,0
-       
-       for byte_i in range(num_bytes) :         
-           ramAddr = int(byteAddr) - int(byteAddr%4)  # Currently host can access only 'word aligned'             
-           if (ramAddr!=prev_ram_addr) :
-              data_word = self.k5s.read_tcm(mem_id,ramAddr)  
-              prev_ram_addr = ramAddr
-              
-           byte_val = (data_word>>(8*(byteAddr%4))) & 0xff 
-                                        
-           for bit_i in range(8) :
-             r = cnt // self.cols               
-             c = cnt % self.cols
-
-             np_grid[r,c] = (byte_val>>bit_i) & 1                                    
-             cnt+=1
-             
-             if (cnt==num_bytes) :
-               break
-
-           if (cnt==num_bytes) :
-               break
-      
-           byteAddr = byteAddr+1 ;               
-               
 #-------------------------------------------------------------------------------------    
 
 def dump_grid(self) :
@@ -74,7 +131,7 @@ class Object(object):
 
 # import multiprocessing
 
-def check_grid(self,itr) :
+def check_grid(self,itr,engine='conv',cache=None,cycle='hash',rule='B3/S23') :
 
      print('Checking Correct result of pattern %s after %d generations' % (self.pat_name,itr))   
      
@@ -93,6 +150,10 @@ def check_grid(self,itr) :
      args.fps  = 10              # Animation Frames (generations) per second     
      args.wrap = is_cgol_xlr_tor # Wrap Mode (Torus)
      args.fftl = True            # fast forward to last    
+     args.engine = engine        # Stepping engine (conv / swar / hashlife)
+     args.cache = cache          # Persistent generation cache directory (None for no cache)
+     args.cycle = cycle          # Cycle detection (hash / brent)
+     args.rule = rule            # Rule implemented by the target (sw/cgol.c is B3/S23)
      
      ref = sar.cgol_animate(args) 
      
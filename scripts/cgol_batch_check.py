@@ -0,0 +1,208 @@
+import numpy as np
+import argparse
+import sys
+import os
+from cgol_pattern_loader import load_pattern, list_patterns
+from cgol_rule import get_rule
+
+#------------------------------------------------------------------------------------
+
+# Invocation Example:
+# Cloud: python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_batch_check.py -itr 100 1000 10000 -wrap both
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_batch_check.py cgol_64x64_edna cgol_32x32_edna -itr 1001 -wrap on -dumps hw_dumps
+
+# Batched reference checker.
+# All (pattern, wrap) combinations are loaded (padded to a common shape) into a single 3-D
+# stack and advanced together, one vectorized step per generation for the whole stack.
+# Each job (pattern, itr, wrap) captures its slot when the stack reaches its generation,
+# so many generation counts of the same pattern cost a single simulation.
+
+#------------------------------------------------------------------------------------
+
+# Load a grid in the '#'/'.' text format, as written by cgol_animate_shared.dump_grid
+def load_dump(dump_file_name):
+
+    with open(dump_file_name,'r') as dump_f :
+        lines = [line.strip() for line in dump_f if len(line.strip())>0]
+
+    return np.array([[1 if p=='#' else 0 for p in line] for line in lines], dtype=int)
+
+#------------------------------------------------------------------------------------
+
+# Load pattern start grid using the shared pattern loader
+def load_start_grid(pic):
+    return load_pattern(pic)
+
+#------------------------------------------------------------------------------------
+
+class cgol_batch_check :
+
+    def __init__(self, rule=None):
+
+        self.rule = get_rule(rule)
+
+        self.jobs  = [] # Requested checks, dict per job
+        self.slots = {} # (pic,wrap) -> stack slot index
+
+        self.pics   = [] # Per slot pattern name
+        self.wraps  = [] # Per slot wrap mode
+        self.starts = [] # Per slot start grid
+
+        self.stack = None
+        self.valid = None
+
+
+    #------------------------------------------------------------------------------------
+
+    # Register a check, checked_grid is the hardware result (None for reference only run)
+    def add(self, pic, itr, wrap, checked_grid=None):
+
+        key = (pic, bool(wrap))
+        if key not in self.slots :
+            self.slots[key] = len(self.pics)
+            self.pics.append(pic)
+            self.wraps.append(bool(wrap))
+            self.starts.append(load_start_grid(pic))
+
+        self.jobs.append({'pic': pic, 'itr': itr, 'wrap': bool(wrap), 'slot': self.slots[key],
+                          'checked_grid': checked_grid, 'grid': None, 'check_ok': None})
+
+    #------------------------------------------------------------------------------------
+
+    # Build the padded 3-D stack and per-slot neighbour index maps.
+    def build_stack(self):
+
+        num_slots = len(self.starts)
+        max_h = max(g.shape[0] for g in self.starts)
+        max_w = max(g.shape[1] for g in self.starts)
+
+        # One extra always-zero row and column serve as the outside of non-wrap grids.
+        self.stack = np.zeros((num_slots, max_h+1, max_w+1), dtype=np.uint8)
+        self.valid = np.zeros((num_slots, max_h+1, max_w+1), dtype=np.uint8)
+
+        self.north = np.full((num_slots, max_h+1), max_h, dtype=np.intp)
+        self.south = np.full((num_slots, max_h+1), max_h, dtype=np.intp)
+        self.west  = np.full((num_slots, max_w+1), max_w, dtype=np.intp)
+        self.east  = np.full((num_slots, max_w+1), max_w, dtype=np.intp)
+
+        for slot, grid in enumerate(self.starts) :
+            h, w = grid.shape
+            self.stack[slot, :h, :w] = grid
+            self.valid[slot, :h, :w] = 1
+
+            r = np.arange(h)
+            c = np.arange(w)
+            if self.wraps[slot] :
+                self.north[slot, :h] = (r-1) % h
+                self.south[slot, :h] = (r+1) % h
+                self.west[slot, :w]  = (c-1) % w
+                self.east[slot, :w]  = (c+1) % w
+            else :
+                self.north[slot, :h] = np.where(r==0,   max_h, r-1)
+                self.south[slot, :h] = np.where(r==h-1, max_h, r+1)
+                self.west[slot, :w]  = np.where(c==0,   max_w, c-1)
+                self.east[slot, :w]  = np.where(c==w-1, max_w, c+1)
+
+        # Broadcastable forms for np.take_along_axis
+        self.north = self.north[:, :, None]
+        self.south = self.south[:, :, None]
+        self.west  = self.west[:, None, :]
+        self.east  = self.east[:, None, :]
+
+    #------------------------------------------------------------------------------------
+
+    # Advance all slots of the stack by a single generation.
+    def step(self, stack):
+
+        vert = stack + np.take_along_axis(stack, self.north, axis=1) + np.take_along_axis(stack, self.south, axis=1)
+        index = vert + np.take_along_axis(vert, self.west, axis=2) + np.take_along_axis(vert, self.east, axis=2) + 8 * stack
+
+        # Apply the rule (lookup index 9*state + neighbors), padding cells are forced dead.
+        return self.rule.lut[index] & self.valid
+
+    #------------------------------------------------------------------------------------
+
+    # Simulate all slots up to the largest requested generation, capturing each job on the way.
+    def run(self):
+
+        self.build_stack()
+
+        max_itr = max(job['itr'] for job in self.jobs)
+        jobs_by_itr = {}
+        for job in self.jobs :
+            jobs_by_itr.setdefault(job['itr'], []).append(job)
+
+        stack = self.stack
+        for gen in range(max_itr+1) :
+
+            for job in jobs_by_itr.get(gen, []) :
+                h, w = self.starts[job['slot']].shape
+                job['grid'] = stack[job['slot'], :h, :w].astype(int)
+                if job['checked_grid'] is not None :
+                    job['check_ok'] = bool(np.array_equal(job['grid'], job['checked_grid']))
+
+            if gen < max_itr :
+                stack = self.step(stack)
+
+        print('Batch Checker: done %d Generations for %d grids ...' % (max_itr, len(self.pics)), flush=True)
+
+        return self.jobs
+
+    #------------------------------------------------------------------------------------
+
+    def report(self):
+
+        num_fail = 0
+        for job in self.jobs :
+            mode = 'wrap' if job['wrap'] else 'non-wrap'
+            if job['check_ok'] is None :
+                status = 'REF '
+            elif job['check_ok'] :
+                status = 'PASS'
+            else :
+                status = 'FAIL'
+                num_fail += 1
+            print('%s %-28s %-8s itr %-8d live cells %d' % (status, job['pic'], mode, job['itr'], job['grid'].sum()))
+
+        if num_fail==0 :
+            print('\n\nGREAT, All checked grids match expected\n')
+        else :
+            print('\n\nERROR, %d checked grids do not match expected\n' % num_fail)
+
+        return num_fail
+
+#----------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description='Cgol Batch Check',formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument('pics', metavar='<inpat_name>', nargs='*', type=str, help='Input pattern names (default all patterns)')
+    ap.add_argument('-itr', metavar='<num_itr>', nargs='+', type=int, default=[0], help='Numbers of iterations (generations)')
+    ap.add_argument('-wrap', metavar='<mode>', type=str, default='off', choices=['off','on','both'], help='Wrap Mode')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default='B3/S23', help='Life-like rule of the checked target (B/S notation)')
+    ap.add_argument('-dumps', metavar='<dir>', type=str, default=None,
+                    help='Hardware dumps directory, files named <inpat_name>_<num_itr>[_wrap].txt')
+
+    args = ap.parse_args()
+
+    pics = args.pics
+    if len(pics)==0 :
+        pics = list_patterns()
+
+    wraps = {'off': [False], 'on': [True], 'both': [False, True]}[args.wrap]
+
+    batch = cgol_batch_check(args.rule)
+    for pic in pics :
+        for wrap in wraps :
+            for itr in args.itr :
+                checked_grid = None
+                if args.dumps is not None :
+                    dump_file_name = '%s/%s_%d%s.txt' % (args.dumps, pic, itr, '_wrap' if wrap else '')
+                    if os.path.exists(dump_file_name) :
+                        checked_grid = load_dump(dump_file_name)
+                batch.add(pic, itr, wrap, checked_grid)
+
+    batch.run()
+    num_fail = batch.report()
+
+    sys.exit(1 if num_fail else 0)
@@ -0,0 +1,399 @@
+import numpy as np
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import types
+import warnings
+import pygame
+import cgol_animate_ref as sar
+from cgol_pattern_loader import list_patterns, load_pattern_bits
+
+#------------------------------------------------------------------------------------
+
+# Invocation Example:
+# Cloud: python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_bench.py cgol_248x248_edna cgol_64x64_edna -gen 200 -wrap both
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_bench.py cgol_64x64_edna -engines conv lut swar -gen 500
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_bench.py -sizes 64 256 1024 -gen 10 100 -json bench.json
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_bench.py -sizes 64 256 1024 -gen 10 100 -baseline bench.json -threshold 0.25
+
+# Benchmark suite of the Python side (reference model stepping engines and host renderers).
+#
+# Grids are the bundled patterns (default all patterns) and seeded random grids of each -sizes NxN.
+# Engines: each (grid, wrap, gen) steps the packed start grid gen generations through cgol_animate.step_states,
+#   update_grid is the allocating scipy convolution step, conv the ping-pong buffers step (step_into).
+# Renderers: each (grid, wrap, gen) draws gen successive generations, only the draw call is timed:
+#   get_grid / get_grid_dirty - grid read back and decode (cgol_animate_shared) from a local fake target
+#   terminal, pyplot          - cgol_terminal_animate / cgol_pyplot_animate display_grid reading the fake target
+#                               (terminal output discarded, pyplot on the Agg backend)
+#   pygame                    - cgol_animate draw_grid into an offscreen surface (downsampled beyond the window)
+# The target side renderers import k5_common, without a K5 install (no K5_ENV / K5_XBOX_FPGA) a stub k5_common
+# is registered (the fake target ignores memory ids). They read hardware size grids only (up to 256x256).
+# hashlife is timed as a single num_gen generations jump (advance), its intended use.
+#
+# The best of repeat runs is reported per generation (engines also as a speedup over conv), -json writes
+# the results, -baseline compares them against a previous -json file and exits with 1 when any result
+# is slower than its baseline by more than the threshold fraction. A result over the threshold is
+# measured again (best of another repeat runs) before it is reported as a regression.
+
+#------------------------------------------------------------------------------------
+
+ENGINES   = ['update_grid', 'conv', 'lut', 'swar', 'sparse', 'hashlife']
+RENDERERS = ['get_grid', 'get_grid_dirty', 'terminal', 'pyplot', 'pygame']
+
+TARGET_GRID_ADDR = 0x100 # Grid soc address in the fake target data memory
+
+#------------------------------------------------------------------------------------
+
+# Local fake target, a k5 session holding the grid bit stream (1 bit per cell LSB first, see sw/bit_array.h)
+# in its word memory, for the get_grid read back without hardware.
+class cgol_fake_target :
+
+    def __init__(self, rows, cols, grid_soc_addr):
+
+        self.grid_soc_addr = grid_soc_addr
+        self.mem = np.zeros((grid_soc_addr + (rows*cols + 7) // 8 + 7) // 4, dtype=np.uint32)
+
+    # Write grid into the target memory at grid_soc_addr
+    def load_grid(self, grid):
+
+        bits = np.packbits(np.asarray(grid, dtype=np.uint8).ravel(), bitorder='little')
+        self.mem.view(np.uint8)[self.grid_soc_addr:self.grid_soc_addr+len(bits)] = bits
+
+    def read_tcm(self, mem_id, addr):
+        return int(self.mem[addr // 4])
+
+    def read_tcm_block(self, mem_id, addr, num_words):
+        return self.mem[addr // 4 : addr // 4 + num_words]
+
+#------------------------------------------------------------------------------------
+
+# Seeded random grid of size x size cells
+def random_grid(size, density, seed):
+    return (np.random.default_rng(seed).random((size, size)) < density).astype(int)
+
+#------------------------------------------------------------------------------------
+
+# Reference model of the grid (pattern name or start grid), None when the engine does not support it
+def bench_ref(pic, start_grid, wrap, engine, num_gen):
+
+    args = types.SimpleNamespace()
+    args.pic        = pic
+    args.start_grid = start_grid
+    args.itr        = num_gen
+    args.fps        = 10
+    args.wrap       = wrap
+    args.fftl       = True
+    args.engine     = 'conv' if engine == 'update_grid' else engine
+
+    try :
+        with contextlib.redirect_stdout(io.StringIO()) :
+            ref = sar.cgol_animate(args)
+    except ValueError : # e.g. hashlife non-wrap
+        return None
+
+    if args.engine != ('conv' if engine == 'update_grid' else engine) : # Grid beyond the conv engine size, switched to swar
+        return None
+
+    return ref
+
+#------------------------------------------------------------------------------------
+
+# Best elapsed seconds per generation of an engine, None when the engine does not support the run
+def bench_engine(pic, start_grid, wrap, engine, num_gen, repeat):
+
+    ref = bench_ref(pic, start_grid, wrap, engine, num_gen)
+    if ref is None :
+        return None
+
+    if engine == 'conv' :
+        ref.start_step_buffers()
+
+    best_sec = None
+    for _ in range(repeat) :
+        state = ref.pack_grid(ref.start_grid)
+        start_time = time.perf_counter()
+        if engine == 'hashlife' :
+            state = ref.engine.advance(state, num_gen)
+        else :
+            state = ref.step_states(state, num_gen)
+        elapsed_sec = time.perf_counter() - start_time
+        best_sec = elapsed_sec if best_sec is None else min(best_sec, elapsed_sec)
+
+    return best_sec / num_gen
+
+#------------------------------------------------------------------------------------
+
+# Without a K5 install, default the K5 environment paths and register a stub k5_common
+# (memory ids only, as used by cgol_animate_shared read_grid_bytes)
+def stub_k5_env():
+
+    if ('K5_ENV' in os.environ) or ('K5_XBOX_FPGA' in os.environ) :
+        return
+
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    os.environ.setdefault('K5_XBOX_FPGA', lib_dir)
+    os.environ.setdefault('K5_XBOX_ENV', lib_dir)
+
+    if 'k5_common' not in sys.modules :
+        k5_common = types.ModuleType('k5_common')
+        k5_common.DMEM = 0
+        k5_common.XMEM = 1
+        k5_common.XSPACE_BASE_ADDR = 0x80000000
+        sys.modules['k5_common'] = k5_common
+
+#------------------------------------------------------------------------------------
+
+# Target side renderer modules, loaded once, None when the K5 environment is incomplete
+target_modules = {}
+
+def load_target_module(name):
+
+    if name not in target_modules :
+        stub_k5_env()
+        try :
+            target_modules[name] = __import__(name)
+        except (ImportError, KeyError) as err : # k5_common or K5 environment variables not available
+            print('%s not available (%s: %s), its renderers are n/a.' % (name, type(err).__name__, err))
+            target_modules[name] = None
+
+    return target_modules[name]
+
+#------------------------------------------------------------------------------------
+
+# Renderer draw function draw(gen, grid) -> elapsed seconds of the draw call, None when the renderer does not support the grid
+def make_renderer(renderer, ref):
+
+    rows, cols = ref.GRID_HEIGHT, ref.GRID_WIDTH
+
+    if renderer == 'pygame' :
+        surface = pygame.Surface((ref.WINDOW_WIDTH, ref.WINDOW_HEIGHT))
+        def draw(gen, grid) :
+            start_time = time.perf_counter()
+            ref.draw_grid(surface, grid)
+            return time.perf_counter() - start_time
+        return draw
+
+    if ref.bit_grid : # Target grids are at most GRID_MAX_HEIGHT x GRID_MAX_WIDTH
+        return None
+
+    sas = load_target_module('cgol_animate_shared')
+    if sas is None :
+        return None
+
+    target = cgol_fake_target(rows, cols, TARGET_GRID_ADDR)
+
+    if renderer in ('get_grid', 'get_grid_dirty') :
+        holder = types.SimpleNamespace()
+        holder.rows = rows
+        holder.cols = cols
+        holder.grid_soc_addr = TARGET_GRID_ADDR
+        holder.k5s = target
+        holder.prev_grid_chunks = None
+        np_grid = np.zeros((rows, cols))
+        get_grid = sas.get_grid if renderer == 'get_grid' else sas.get_grid_dirty
+        def draw(gen, grid) :
+            target.load_grid(grid)
+            start_time = time.perf_counter()
+            get_grid(holder, np_grid, gen)
+            return time.perf_counter() - start_time
+        return draw
+
+    if renderer == 'terminal' :
+        terminal_module = load_target_module('cgol_terminal_animate')
+        if terminal_module is None :
+            return None
+
+        # Terminal animation writing its frames nowhere (frame strings are still built)
+        class quiet_terminal_animate(terminal_module.cgol_terminal_animate) :
+            def clear_screen(self):
+                pass
+            def write_frame(self, frame_str):
+                pass
+
+        with contextlib.redirect_stdout(io.StringIO()) :
+            animate = quiet_terminal_animate(rows, cols, TARGET_GRID_ADDR, 0, target)
+
+    elif renderer == 'pyplot' :
+        sar.plt.switch_backend('Agg')
+        pyplot_module = load_target_module('cgol_pyplot_animate')
+        if pyplot_module is None :
+            return None
+
+        with warnings.catch_warnings() : # Agg is non-interactive, plt.show warns
+            warnings.simplefilter('ignore')
+            animate = pyplot_module.cgol_pyplot_animate(rows, cols, TARGET_GRID_ADDR, target)
+
+    else :
+        raise ValueError('Unknown renderer %s' % renderer)
+
+    def draw(gen, grid) :
+        target.load_grid(grid)
+        start_time = time.perf_counter()
+        if renderer == 'terminal' :
+            animate.display_grid(gen)
+        else :
+            animate.display_grid(gen, False)
+        return time.perf_counter() - start_time
+    return draw
+
+#------------------------------------------------------------------------------------
+
+# Best elapsed seconds per drawn generation of a renderer, None when the renderer does not support the run.
+# The generations are stepped by the lut engine (not timed), a new renderer per run so the first full frame is included.
+def bench_renderer(pic, start_grid, wrap, renderer, num_gen, repeat):
+
+    ref = bench_ref(pic, start_grid, wrap, 'lut', num_gen)
+    if ref is None :
+        return None
+
+    best_sec = None
+    for _ in range(repeat) :
+        draw = make_renderer(renderer, ref)
+        if draw is None :
+            return None
+
+        elapsed_sec = 0
+        state = ref.pack_grid(ref.start_grid)
+        for gen in range(1, num_gen + 1) :
+            state = ref.step_state(state)
+            elapsed_sec += draw(gen, ref.unpack_grid(state))
+        best_sec = elapsed_sec if best_sec is None else min(best_sec, elapsed_sec)
+
+        if renderer == 'pyplot' :
+            sar.plt.close('all')
+
+    return best_sec / num_gen
+
+#------------------------------------------------------------------------------------
+
+# Baseline comparison key of a result
+def result_key(result):
+    return '%s %s %s %s gen %d' % (result['bench'], result['pic'], 'wrap' if result['wrap'] else 'non-wrap', result['name'], result['gen'])
+
+#------------------------------------------------------------------------------------
+
+# Best seconds per generation of the result run (engine or renderer on grid pic / start_grid)
+def bench_result(result, start_grid, repeat):
+
+    if result['bench'] == 'engine' :
+        return bench_engine(result['pic'], start_grid, result['wrap'], result['name'], result['gen'], repeat)
+
+    return bench_renderer(result['pic'], start_grid, result['wrap'], result['name'], result['gen'], repeat)
+
+#------------------------------------------------------------------------------------
+
+# grids is a list of (name, start grid), start grid None for a pattern name
+def bench(grids, wraps, engines, renderers, gens, repeat):
+
+    print('%-24s %-9s %-9s %6s %-8s %-14s %9s  %s' % ('pattern', 'size', 'mode', 'gen', 'bench', 'name', 'ms/gen', 'vs conv'))
+
+    results = []
+    for pic, start_grid in grids :
+        shape = load_pattern_bits(pic).shape if start_grid is None else start_grid.shape
+        for wrap in wraps :
+            for num_gen in gens :
+                conv_sec = None
+                for bench_name, names in [('engine', engines), ('renderer', renderers)] :
+                    for name in names :
+                        result = {'bench': bench_name, 'name': name, 'pic': pic, 'size': '%dx%d' % shape, 'wrap': wrap, 'gen': num_gen}
+                        sec = bench_result(result, start_grid, repeat)
+                        if name == 'conv' :
+                            conv_sec = sec
+                        result['sec_per_gen'] = sec
+                        results.append(result)
+
+                        line = '%-24s %-9s %-9s %6d %-8s %-14s ' % (pic, '%dx%d' % shape, 'wrap' if wrap else 'non-wrap', num_gen, bench_name, name)
+                        if sec is None :
+                            print(line + '%9s' % 'n/a', flush=True)
+                        elif (bench_name == 'engine') and (conv_sec is not None) and (name != 'conv') :
+                            print(line + '%9.3f  x%.1f' % (sec * 1e3, conv_sec / sec), flush=True)
+                        else :
+                            print(line + '%9.3f' % (sec * 1e3), flush=True)
+
+    return results
+
+#------------------------------------------------------------------------------------
+
+# Compare results against baseline results, returns the regressions (slower than baseline by more than threshold).
+# A result over the threshold is measured again by remeasure(result) and its best time kept.
+def compare(results, baseline_results, threshold, remeasure):
+
+    baseline_sec = {result_key(result): result['sec_per_gen'] for result in baseline_results}
+
+    print('\nBaseline comparison (regression above x%.2f):' % (1 + threshold))
+
+    regressions = []
+    num_compared = 0
+    for result in results :
+        key = result_key(result)
+        base_sec = baseline_sec.get(key)
+        if (base_sec is None) or (result['sec_per_gen'] is None) :
+            continue
+        num_compared += 1
+        if result['sec_per_gen'] > base_sec * (1 + threshold) :
+            result['sec_per_gen'] = min(result['sec_per_gen'], remeasure(result))
+        ratio = result['sec_per_gen'] / base_sec
+        if ratio > 1 + threshold :
+            regressions.append(result)
+        print('%-60s %9.3f -> %9.3f ms/gen  x%.2f%s' % (key, base_sec * 1e3, result['sec_per_gen'] * 1e3, ratio,
+                                                        '  REGRESSION' if ratio > 1 + threshold else ''))
+
+    print('%d results compared, %d regressions.' % (num_compared, len(regressions)))
+
+    return regressions
+
+#----------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description='Cgol Benchmark Suite',formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument('pics', metavar='<inpat_name>', nargs='*', type=str, help='Input pattern names (default all patterns, none with -sizes)')
+    ap.add_argument('-sizes', metavar='<num_cells>', nargs='+', type=int, default=[], help='Random square grid sizes (cells per side)')
+    ap.add_argument('-density', metavar='<fraction>', type=float, default=0.3, help='Random grids alive cells fraction')
+    ap.add_argument('-seed', metavar='<seed>', type=int, default=1, help='Random grids seed')
+    ap.add_argument('-engines', metavar='<engine>', nargs='*', type=str, default=ENGINES, choices=ENGINES, help='Engines to compare')
+    ap.add_argument('-renderers', metavar='<renderer>', nargs='*', type=str, default=RENDERERS, choices=RENDERERS, help='Renderers to compare')
+    ap.add_argument('-gen', metavar='<num_gen>', nargs='+', type=int, default=[100], help='Generations per run (one run set per value)')
+    ap.add_argument('-repeat', metavar='<num_runs>', type=int, default=5, help='Runs per engine / renderer, the best is reported')
+    ap.add_argument('-wrap', metavar='<mode>', type=str, default='both', choices=['off','on','both'], help='Wrap Mode')
+    ap.add_argument('-json', metavar='<file>', type=str, default=None, help='Write results to json file')
+    ap.add_argument('-baseline', metavar='<file>', type=str, default=None, help='Compare results against a previous -json file')
+    ap.add_argument('-threshold', metavar='<fraction>', type=float, default=0.25,
+                    help='Slowdown fraction over the baseline failing the run (exit code 1)')
+    args = ap.parse_args()
+
+    baseline = None
+    if args.baseline is not None : # Read first, the baseline may also be the -json output file
+        with open(args.baseline) as f :
+            baseline = json.load(f)
+
+    pics = args.pics
+    if (len(pics)==0) and (len(args.sizes)==0) :
+        pics = list_patterns()
+
+    grids = [(pic, None) for pic in pics]
+    grids += [('random_%dx%d' % (size, size), random_grid(size, args.density, args.seed)) for size in args.sizes]
+
+    wraps = {'off': [False], 'on': [True], 'both': [False, True]}[args.wrap]
+
+    results = bench(grids, wraps, args.engines, args.renderers, args.gen, args.repeat)
+
+    regressions = []
+    if baseline is not None :
+        start_grids = dict(grids)
+        regressions = compare(results, baseline['results'], args.threshold,
+                              lambda result : bench_result(result, start_grids[result['pic']], args.repeat))
+
+    if args.json is not None :
+        with open(args.json, 'w') as f :
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                       'repeat': args.repeat, 'results': results}, f, indent=1)
+        print('Results written to %s' % args.json)
+
+    if len(regressions) > 0 :
+        sys.exit(1)
@@ -0,0 +1,113 @@
+import numpy as np
+
+#------------------------------------------------------------------------------------
+
+# Bit-packed grid for grids beyond the hardware maximum (sw/cgol_shared_lib.h MAX_WIDTH/MAX_HEIGHT).
+#
+# Each row is packed 1 bit per cell, column c at bit (c%8) of byte (c//8) (LSB first as in sw/bit_array.h),
+# rows padded to whole uint64 words, so the memory is about rows*cols/8 bytes and the data can be
+# used directly (as a uint64 view) as the cgol_swar_engine state.
+#
+# Dense views are only produced on request (to_dense, get_rows), display downsampling works on the packed rows.
+
+#------------------------------------------------------------------------------------
+
+POPCOUNT8 = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+
+#------------------------------------------------------------------------------------
+
+# Block max (any alive cell in block) downsample of a dense grid to out_rows x out_cols
+def downsample(grid, out_rows, out_cols):
+
+    rows, cols = grid.shape
+    row_edges = np.arange(out_rows) * rows // out_rows
+    col_edges = np.arange(out_cols) * cols // out_cols
+
+    return np.maximum.reduceat(np.maximum.reduceat(grid, row_edges, axis=0), col_edges, axis=1)
+
+#------------------------------------------------------------------------------------
+
+# Display layout of a rows x cols grid in a max_px window: (cell_size, disp_rows, disp_cols).
+# Grids larger than the window are downsampled by a whole factor to 1 pixel per displayed cell.
+def display_shape(rows, cols, max_px=640):
+
+    cell_size = max_px // max(rows, cols)
+    if cell_size >= 1 :
+        return cell_size, rows, cols
+
+    factor = -(-max(rows, cols) // max_px)
+    return 1, -(-rows // factor), -(-cols // factor)
+
+#------------------------------------------------------------------------------------
+
+class cgol_bit_grid :
+
+    def __init__(self, rows, cols, data=None):
+
+        self.rows = rows
+        self.cols = cols
+        self.shape = (rows, cols)
+
+        self.row_bytes = ((cols + 63) // 64) * 8
+
+        if data is None :
+            self.data = np.zeros((rows, self.row_bytes), dtype=np.uint8)
+        else :
+            self.data = np.asarray(data, dtype=np.uint8).reshape(rows, self.row_bytes)
+
+        self.nbytes = self.data.nbytes
+
+    #------------------------------------------------------------------------------------
+
+    # Rows as uint64 words (cgol_swar_engine state layout)
+    def words(self):
+        return self.data.view('<u8')
+
+    #------------------------------------------------------------------------------------
+
+    # Dense 0/1 rows r0..r1-1
+    def get_rows(self, r0, r1, dtype=np.uint8):
+        return np.unpackbits(self.data[r0:r1], axis=1, bitorder='little')[:, :self.cols].astype(dtype, copy=False)
+
+    #------------------------------------------------------------------------------------
+
+    def to_dense(self, dtype=int):
+        return self.get_rows(0, self.rows, dtype)
+
+    #------------------------------------------------------------------------------------
+
+    # Number of live cells
+    def sum(self):
+        return int(POPCOUNT8[self.data].sum(dtype=np.int64))
+
+    #------------------------------------------------------------------------------------
+
+    # Block max downsample to out_rows x out_cols.
+    # Row blocks are OR-reduced on the packed bytes, only out_rows rows are ever decoded.
+    def downsample(self, out_rows, out_cols):
+
+        row_edges = np.arange(out_rows) * self.rows // out_rows
+        col_edges = np.arange(out_cols) * self.cols // out_cols
+
+        packed_rows = np.bitwise_or.reduceat(self.data, row_edges, axis=0)
+        dense_rows = np.unpackbits(packed_rows, axis=1, bitorder='little')[:, :self.cols]
+
+        return np.maximum.reduceat(dense_rows, col_edges, axis=1)
+
+#------------------------------------------------------------------------------------
+
+# Bit grid from packed rows (rows x ceil(cols/8) bytes, LSB first)
+def bit_grid_from_packed_rows(rows, cols, packed_rows):
+
+    bit_grid = cgol_bit_grid(rows, cols)
+    bit_grid.data[:, :packed_rows.shape[1]] = packed_rows
+
+    return bit_grid
+
+#------------------------------------------------------------------------------------
+
+# Bit grid from dense 0/1 grid
+def bit_grid_from_dense(grid):
+
+    grid = np.asarray(grid)
+    return bit_grid_from_packed_rows(grid.shape[0], grid.shape[1], np.packbits(grid.astype(np.uint8), axis=1, bitorder='little'))
@@ -0,0 +1,140 @@
+import numpy as np
+import os
+import shutil
+import subprocess
+from PIL import Image, GifImagePlugin
+
+#------------------------------------------------------------------------------------
+
+# Headless frame export of grids (no pygame surface per frame).
+#
+# A frame is built directly from the numpy grid as palette indexes
+# (0 background, 1 alive cell, 2 grid line), cell_size pixels per cell,
+# same layout as the pygame rendered images.
+#
+# Formats:
+#   png    - PNG sequence, <path>/gen_<generation>.png (path is a directory)
+#   gif    - Animated GIF, each frame encoded and written as it is added (no frames kept in memory)
+#   ffmpeg - Raw rgb24 frames piped to a local ffmpeg, encoded to path (e.g. .mp4)
+
+#------------------------------------------------------------------------------------
+
+# Grid lines are drawn from 2 pixels per cell (at 1 pixel per cell they would hide all cells),
+# same threshold for exported frames, saved grid images and the pygame renderer
+def show_grid_lines(cell_size):
+    return cell_size > 1
+
+#------------------------------------------------------------------------------------
+
+# Palette index frame of grid
+def grid_frame(grid, cell_size, grid_lines=True):
+
+    frame = np.repeat(np.repeat((np.asarray(grid) == 1).astype(np.uint8), cell_size, axis=0), cell_size, axis=1)
+
+    if grid_lines :
+        frame[::cell_size, :] = 2
+        frame[:, ::cell_size] = 2
+
+    return frame
+
+#------------------------------------------------------------------------------------
+
+# Infer export format from path
+def export_fmt(path):
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gif' :
+        return 'gif'
+    if ext in ['.mp4', '.mkv', '.avi', '.webm', '.mov'] :
+        return 'ffmpeg'
+    return 'png'
+
+#------------------------------------------------------------------------------------
+
+class cgol_frame_export :
+
+    def __init__(self, path, fmt, cell_size, bg_color, alive_color, grid_color, fps=10, grid_lines=True):
+
+        self.path = path
+        self.fmt = fmt
+        self.cell_size = cell_size
+        self.fps = fps
+        self.grid_lines = grid_lines
+
+        self.palette = np.array([bg_color, alive_color, grid_color], dtype=np.uint8)
+        self.pil_palette = self.palette.ravel().tolist()
+
+        self.num_frames = 0
+        self.gif_file = None
+        self.ffmpeg_proc = None
+
+        if self.fmt == 'png' :
+            os.makedirs(self.path, exist_ok=True)
+        elif self.fmt == 'ffmpeg' :
+            if shutil.which('ffmpeg') is None :
+                raise RuntimeError('ffmpeg not found, use png or gif export')
+        elif self.fmt != 'gif' :
+            raise ValueError('Unknown export format %s' % self.fmt)
+
+    #------------------------------------------------------------------------------------
+
+    def palette_image(self, frame):
+
+        img = Image.frombytes('P', (frame.shape[1], frame.shape[0]), np.ascontiguousarray(frame).tobytes())
+        img.putpalette(self.pil_palette)
+        return img
+
+    #------------------------------------------------------------------------------------
+
+    def start_ffmpeg(self, height, width):
+
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (width, height), '-r', str(self.fps), '-i', '-',
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', self.path]
+        self.ffmpeg_proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    #------------------------------------------------------------------------------------
+
+    # Append palette image frame to the GIF file, the GIF header (global palette, endless loop) written with the first frame
+    def write_gif_frame(self, img):
+
+        if self.gif_file is None :
+            self.gif_file = open(self.path, 'wb')
+            header, used_colors = GifImagePlugin.getheader(img, None, {'loop': 0, 'optimize': False})
+            for chunk in header :
+                self.gif_file.write(chunk)
+
+        for chunk in GifImagePlugin.getdata(img, duration=max(1, 1000 // self.fps), optimize=False) :
+            self.gif_file.write(chunk)
+
+    #------------------------------------------------------------------------------------
+
+    def add_frame(self, grid, gen):
+
+        frame = grid_frame(grid, self.cell_size, self.grid_lines)
+
+        if self.fmt == 'png' :
+            self.palette_image(frame).save(os.path.join(self.path, 'gen_%08d.png' % gen), optimize=False)
+        elif self.fmt == 'gif' :
+            self.write_gif_frame(self.palette_image(frame))
+        else :
+            if self.ffmpeg_proc is None :
+                self.start_ffmpeg(*frame.shape)
+            self.ffmpeg_proc.stdin.write(self.palette[frame].tobytes())
+
+        self.num_frames += 1
+
+    #------------------------------------------------------------------------------------
+
+    def close(self):
+
+        if self.fmt == 'gif' and self.gif_file is not None :
+            self.gif_file.write(b';') # GIF trailer
+            self.gif_file.close()
+            self.gif_file = None
+        elif self.fmt == 'ffmpeg' and self.ffmpeg_proc is not None :
+            self.ffmpeg_proc.stdin.close()
+            self.ffmpeg_proc.wait()
+            self.ffmpeg_proc = None
+
+        print('Exported %d frames to %s' % (self.num_frames, self.path))
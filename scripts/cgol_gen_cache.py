@@ -0,0 +1,141 @@
+import numpy as np
+import hashlib
+import os
+
+#------------------------------------------------------------------------------------
+
+# Persistent generation-result cache.
+#
+# Checkpoint grids are stored bit-packed (1 bit per cell, LSB first as in sw/bit_array.h)
+# under a content address: a hash of the start grid, its shape, the boundary mode and the rule.
+#
+#   <cache_dir>/<key>/<generation>.bin
+#
+# A check can resume from the nearest cached generation not above the requested one.
+# The total cache size is bounded, least recently used checkpoint files are evicted first
+# (file mtime is refreshed on every hit). The cache directory is scanned on the first store, then a
+# running size is kept (stored files added) and the directory rescanned only when it exceeds the bound.
+# Eviction then goes down to 3/4 of the bound, so a full cache is not rescanned on every store.
+
+#------------------------------------------------------------------------------------
+
+class cgol_gen_cache :
+
+    def __init__(self, cache_dir, interval=4096, max_mb=512):
+
+        self.cache_dir = cache_dir
+        self.interval  = interval                  # Generations between stored checkpoints
+        self.max_bytes = int(max_mb * 1024 * 1024) # Cache size bound
+
+        self.hits = 0
+        self.stores = 0
+        self.total_bytes = None # Running cache size, None until scanned
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    #------------------------------------------------------------------------------------
+
+    # Content address of a run: start grid, boundary mode and rule.
+    def key(self, start_grid, wrap, rule='B3/S23'):
+
+        grid = np.asarray(start_grid, dtype=np.uint8)
+        h = hashlib.sha256()
+        h.update(('%d %d %s %s ' % (grid.shape[0], grid.shape[1], 'wrap' if wrap else 'fill', rule)).encode())
+        h.update(np.packbits(grid, bitorder='little').tobytes())
+
+        return h.hexdigest()
+
+    #------------------------------------------------------------------------------------
+
+    def gen_file_name(self, key, gen):
+        return os.path.join(self.cache_dir, key, '%d.bin' % gen)
+
+    #------------------------------------------------------------------------------------
+
+    # Return (gen, grid) of the nearest cached generation <= gen, or (0, None) when none.
+    def nearest(self, key, gen, shape):
+
+        key_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(key_dir) :
+            return 0, None
+
+        cached_gens = [int(f[:-4]) for f in os.listdir(key_dir) if f.endswith('.bin')]
+        cached_gens = [g for g in cached_gens if g <= gen]
+        if len(cached_gens)==0 :
+            return 0, None
+
+        best_gen = max(cached_gens)
+        file_name = self.gen_file_name(key, best_gen)
+
+        try :
+            packed = np.fromfile(file_name, dtype=np.uint8)
+            os.utime(file_name) # Mark as recently used
+        except OSError : # Evicted meanwhile by another process
+            return 0, None
+
+        rows, cols = shape
+        grid = np.unpackbits(packed, bitorder='little')[:rows*cols].reshape(rows, cols).astype(int)
+        self.hits += 1
+
+        return best_gen, grid
+
+    #------------------------------------------------------------------------------------
+
+    # Store grid of generation gen, then enforce the cache size bound.
+    def store(self, key, gen, grid):
+
+        file_name = self.gen_file_name(key, gen)
+        if os.path.exists(file_name) :
+            return
+
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+        # Write to a temporary file then rename, so concurrent readers never see a partial file.
+        tmp_file_name = '%s.%d.tmp' % (file_name, os.getpid())
+        packed = np.packbits(np.asarray(grid, dtype=np.uint8), bitorder='little')
+        packed.tofile(tmp_file_name)
+        os.replace(tmp_file_name, file_name)
+        self.stores += 1
+
+        if self.total_bytes is not None :
+            self.total_bytes += packed.nbytes
+        if (self.total_bytes is None) or (self.total_bytes > self.max_bytes) :
+            self.evict()
+
+    #------------------------------------------------------------------------------------
+
+    # Scan the cache, remove least recently used checkpoints down to 3/4 of its size bound.
+    def evict(self):
+
+        entries = []
+        total_bytes = 0
+        for key in os.listdir(self.cache_dir) :
+            key_dir = os.path.join(self.cache_dir, key)
+            if not os.path.isdir(key_dir) :
+                continue
+            for f in os.listdir(key_dir) :
+                if not f.endswith('.bin') :
+                    continue
+                file_name = os.path.join(key_dir, f)
+                try :
+                    st = os.stat(file_name)
+                except OSError :
+                    continue
+                entries.append((st.st_mtime, st.st_size, file_name))
+                total_bytes += st.st_size
+
+        if total_bytes <= self.max_bytes :
+            self.total_bytes = total_bytes
+            return
+
+        entries.sort()
+        for mtime, size, file_name in entries :
+            if total_bytes <= self.max_bytes * 3 // 4 :
+                break
+            try :
+                os.remove(file_name)
+            except OSError :
+                pass
+            total_bytes -= size
+
+        self.total_bytes = total_bytes
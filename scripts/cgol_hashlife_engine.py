@@ -0,0 +1,300 @@
+import numpy as np
+from cgol_rule import get_rule
+
+#------------------------------------------------------------------------------------
+
+# HashLife (memoized quadtree) Game of Life engine for torus (wrap) grids.
+#
+# The torus is represented by tiling the grid over the infinite plane, which evolves
+# exactly like the torus. A jump of N generations is done in stages, one per set bit j of N:
+# a tiled universe quadtree is built (distinct nodes only per (level, row%H, col%W), so tiling
+# stays compact), its center is advanced 2^j generations with the HashLife recursion, and an
+# HxW window of the periodic result is read back as the torus grid for the next stage.
+#
+# Nodes are interned (hash-consed) and successor results memoized, both tables persist across
+# stages and runs. They are bounded by max_nodes entries each: a stage filling a table is aborted,
+# the tables are cleared (garbage collected) and the stage restarted, split into two half stages
+# if it fills the empty tables again.
+#
+# Single generations (step) are stepped directly on the dense grid, a tiled tree build per
+# generation would cost far more than the step itself. Jumps (advance, step_n) use HashLife.
+#
+# A non-wrap grid has a fixed dead border, which is not translation invariant, hence not
+# supported by HashLife. Neither are rules giving birth on empty neighborhoods (B0), as
+# empty nodes are assumed to stay empty.
+
+#------------------------------------------------------------------------------------
+
+# Node or memo table reached max_nodes during a stage
+class hl_tables_full(Exception) :
+    pass
+
+#------------------------------------------------------------------------------------
+
+class hl_node :
+
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'pop')
+
+    def __init__(self, nw, ne, sw, se, level, pop):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level # Node covers 2^level x 2^level cells
+        self.pop = pop     # Number of live cells
+
+#------------------------------------------------------------------------------------
+
+class cgol_hashlife_engine :
+
+    def __init__(self, rows, cols, wrap, max_nodes=4000000, rule=None):
+
+        self.rule = get_rule(rule)
+
+        if not wrap :
+            raise ValueError('hashlife engine supports wrap (torus) mode only')
+        if self.rule.births_on_empty :
+            raise ValueError('hashlife engine does not support B0 rules (%s)' % self.rule)
+
+        self.rows = rows
+        self.cols = cols
+        self.wrap = wrap
+        self.max_nodes = max_nodes
+
+        self.OFF = hl_node(None, None, None, None, 0, 0)
+        self.ON  = hl_node(None, None, None, None, 0, 1)
+
+        # Smallest level whose half (the advanced center) covers a full grid window.
+        self.min_level = 2
+        while (1 << (self.min_level-1)) < max(rows, cols) :
+            self.min_level += 1
+
+        self.gc_count = 0
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+        self.clear_tables()
+
+    #------------------------------------------------------------------------------------
+
+    # Drop all interned nodes and memoized results (garbage collection)
+    def clear_tables(self):
+
+        self.nodes = {}        # (nw,ne,sw,se) -> interned node
+        self.memo  = {}        # (node,j) -> center node advanced 2^j generations
+        self.empty = [self.OFF] # Per level empty node
+
+    #------------------------------------------------------------------------------------
+
+    def stats(self):
+        return {'nodes'       : len(self.nodes),
+                'memo'        : len(self.memo),
+                'memo_hits'   : self.memo_hits,
+                'memo_misses' : self.memo_misses,
+                'gc_count'    : self.gc_count,
+                'max_nodes'   : self.max_nodes}
+
+    #------------------------------------------------------------------------------------
+
+    # Interned node construction
+    def join(self, nw, ne, sw, se):
+
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None :
+            if len(self.nodes) >= self.max_nodes :
+                raise hl_tables_full()
+            node = hl_node(nw, ne, sw, se, nw.level+1, nw.pop+ne.pop+sw.pop+se.pop)
+            self.nodes[key] = node
+
+        return node
+
+    #------------------------------------------------------------------------------------
+
+    def empty_node(self, level):
+
+        while len(self.empty) <= level :
+            e = self.empty[-1]
+            self.empty.append(self.join(e, e, e, e))
+
+        return self.empty[level]
+
+    #------------------------------------------------------------------------------------
+
+    # Base case: 4x4 node (level 2) -> its 2x2 center one generation later
+    def life_4x4(self, m):
+
+        cells = [[m.nw.nw, m.nw.ne, m.ne.nw, m.ne.ne],
+                 [m.nw.sw, m.nw.se, m.ne.sw, m.ne.se],
+                 [m.sw.nw, m.sw.ne, m.se.nw, m.se.ne],
+                 [m.sw.sw, m.sw.se, m.se.sw, m.se.se]]
+
+        new = [[None, None], [None, None]]
+        for y in (1, 2) :
+            for x in (1, 2) :
+                index = sum(cells[y+dy][x+dx].pop for dy in (-1, 0, 1) for dx in (-1, 0, 1)) + 8 * cells[y][x].pop
+                new[y-1][x-1] = self.ON if self.rule.lut[index] else self.OFF
+
+        return self.join(new[0][0], new[0][1], new[1][0], new[1][1])
+
+    #------------------------------------------------------------------------------------
+
+    # Center (level-1) of node m advanced 2^j generations, j <= level-2
+    def successor(self, m, j):
+
+        if m.pop == 0 :
+            return self.empty_node(m.level-1)
+
+        j = min(j, m.level-2)
+        key = (m, j)
+        s = self.memo.get(key)
+        if s is not None :
+            self.memo_hits += 1
+            return s
+        self.memo_misses += 1
+
+        if m.level == 2 :
+            s = self.life_4x4(m)
+        else :
+            nw, ne, sw, se = m.nw, m.ne, m.sw, m.se
+
+            # 9 overlapping sub-nodes of level-1, each advanced
+            c1 = self.successor(nw, j)
+            c2 = self.successor(self.join(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(self.join(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(self.join(nw.se, ne.sw, sw.ne, se.nw), j)
+            c6 = self.successor(self.join(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(self.join(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+
+            if j < m.level-2 : # Already advanced 2^j, only re-center
+                s = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw),
+                              self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                              self.join(c4.se, c5.sw, c7.ne, c8.nw),
+                              self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else : # Advance the 4 recombined quadrants once more by 2^(level-3)
+                s = self.join(self.successor(self.join(c1, c2, c4, c5), j),
+                              self.successor(self.join(c2, c3, c5, c6), j),
+                              self.successor(self.join(c4, c5, c7, c8), j),
+                              self.successor(self.join(c5, c6, c8, c9), j))
+
+        if len(self.memo) >= self.max_nodes :
+            raise hl_tables_full()
+        self.memo[key] = s
+        return s
+
+    #------------------------------------------------------------------------------------
+
+    # Quadtree of the tiled plane, node at level with top-left cell (y,x)
+    def build_tiled(self, grid, level, y, x, tile_memo):
+
+        y %= self.rows
+        x %= self.cols
+
+        if level == 0 :
+            return self.ON if grid[y, x] else self.OFF
+
+        key = (level, y, x)
+        node = tile_memo.get(key)
+        if node is None :
+            half = 1 << (level-1)
+            node = self.join(self.build_tiled(grid, level-1, y,      x,      tile_memo),
+                             self.build_tiled(grid, level-1, y,      x+half, tile_memo),
+                             self.build_tiled(grid, level-1, y+half, x,      tile_memo),
+                             self.build_tiled(grid, level-1, y+half, x+half, tile_memo))
+            tile_memo[key] = node
+
+        return node
+
+    #------------------------------------------------------------------------------------
+
+    # Copy window [0,rows)x[0,cols) of node (top-left at (top,left)) into out
+    def read_window(self, node, top, left, out):
+
+        size = 1 << node.level
+        if (node.pop == 0) or (top >= self.rows) or (left >= self.cols) :
+            return
+
+        if node.level == 0 :
+            out[top, left] = 1
+            return
+
+        half = size >> 1
+        self.read_window(node.nw, top,      left,      out)
+        self.read_window(node.ne, top,      left+half, out)
+        self.read_window(node.sw, top+half, left,      out)
+        self.read_window(node.se, top+half, left+half, out)
+
+    #------------------------------------------------------------------------------------
+
+    # Advance torus grid 2^j generations, bounded tables (see header)
+    def advance_pow2(self, grid, j):
+
+        for retry in range(2) :
+            try :
+                return self.advance_tree(grid, j)
+            except hl_tables_full :
+                self.clear_tables()
+                self.gc_count += 1
+
+        if j == 0 :
+            raise ValueError('HashLife max_nodes %d too small for a %dx%d grid' % (self.max_nodes, self.rows, self.cols))
+
+        return self.advance_pow2(self.advance_pow2(grid, j-1), j-1)
+
+    #------------------------------------------------------------------------------------
+
+    # Advance torus grid 2^j generations by the HashLife recursion (raises hl_tables_full)
+    def advance_tree(self, grid, j):
+
+        level = max(j+2, self.min_level)
+        root = self.build_tiled(grid, level, 0, 0, {})
+        center = self.successor(root, j)
+
+        window = np.zeros((self.rows, self.cols), dtype=int)
+        self.read_window(center, 0, 0, window)
+
+        # center top-left cell is universe cell (offset, offset)
+        offset = 1 << (level-2)
+        return np.roll(window, (offset % self.rows, offset % self.cols), axis=(0, 1))
+
+    #------------------------------------------------------------------------------------
+
+    # Advance torus grid num_gen generations
+    def advance(self, grid, num_gen):
+
+        grid = np.asarray(grid, dtype=int)
+
+        j = 0
+        while num_gen > 0 :
+            if num_gen & 1 :
+                grid = self.advance_pow2(grid, j)
+            num_gen >>= 1
+            j += 1
+
+        return grid
+
+    #------------------------------------------------------------------------------------
+
+    # Engine interface, state is the dense grid
+    def pack(self, grid):
+        return np.array(grid, dtype=int)
+
+    def unpack(self, state):
+        return state
+
+    # Single generation on the dense torus grid, rule lookup of 9*state + neighbors
+    def step(self, state):
+
+        index = 9 * state
+        for dy in (-1, 0, 1) :
+            for dx in (-1, 0, 1) :
+                if (dy, dx) != (0, 0) :
+                    index = index + np.roll(state, (dy, dx), axis=(0, 1))
+
+        return self.rule.lut[index].astype(int)
+
+    def step_n(self, state, num_gen):
+        return self.advance(state, num_gen)
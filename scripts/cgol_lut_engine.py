@@ -0,0 +1,117 @@
+import numpy as np
+from cgol_bit_grid import cgol_bit_grid, bit_grid_from_dense
+from cgol_rule import get_rule
+
+#------------------------------------------------------------------------------------
+
+# Lookup table block stepping engine.
+#
+# The grid is stepped in 2x2 cell blocks. A 65536 entry table, precomputed from the rule, maps every
+# 4x4 neighborhood (bit 4*row+col) to the next state of its inner 2x2 block (nibble, bit 2*row+col).
+# A generation packs each grid row into 4-cell nibbles at every even column (row window of 4 cells,
+# as calc_new_row in sw/cgol.c slides its 3 row window), stacks 4 nibble rows into the 16 bit
+# table indexes of all blocks, and does a single table gather.
+#
+# The state is the grid surrounded by a halo (one cell, plus one more on odd sides so the blocks
+# cover the grid), holding the torus opposite edge (wrap) or dead cells, refreshed after each step.
+
+#------------------------------------------------------------------------------------
+
+# 4x4 neighborhood index -> inner 2x2 next state nibble
+def block_table(rule):
+
+    index = np.arange(1 << 16, dtype=np.uint32)
+    cells = ((index[:, None] >> np.arange(16, dtype=np.uint32)) & 1).astype(np.uint8).reshape(-1, 4, 4)
+
+    table = np.zeros(1 << 16, dtype=np.uint8)
+    for r in (1, 2) :
+        for c in (1, 2) :
+            rule_index = cells[:, r-1:r+2, c-1:c+2].sum(axis=(1, 2)) + 8 * cells[:, r, c]
+            table |= rule.lut[rule_index] << (2 * (r-1) + (c-1))
+
+    return table
+
+#------------------------------------------------------------------------------------
+
+class cgol_lut_engine :
+
+    def __init__(self, rows, cols, wrap, rule=None):
+
+        self.rows = rows
+        self.cols = cols
+        self.wrap = wrap
+        self.rule = get_rule(rule)
+
+        # Block covered (even) size
+        self.even_rows = rows + (rows & 1)
+        self.even_cols = cols + (cols & 1)
+
+        self.table = block_table(self.rule)
+
+    #------------------------------------------------------------------------------------
+
+    # Engine interface, state is the (even_rows+2, even_cols+2) uint8 grid with its halo
+    def pack(self, grid):
+
+        if isinstance(grid, cgol_bit_grid) :
+            grid = grid.to_dense(np.uint8)
+
+        state = np.zeros((self.even_rows + 2, self.even_cols + 2), dtype=np.uint8)
+        state[1:self.rows+1, 1:self.cols+1] = grid
+        self.fill_halo(state)
+
+        return state
+
+    def unpack(self, state):
+        return state[1:self.rows+1, 1:self.cols+1].astype(int)
+
+    def unpack_bits(self, state):
+        return bit_grid_from_dense(state[1:self.rows+1, 1:self.cols+1])
+
+    #------------------------------------------------------------------------------------
+
+    # Halo rows and columns around the grid cells, rows first so corners get the diagonal opposite cell
+    def fill_halo(self, x):
+
+        r = self.rows
+        c = self.cols
+
+        if self.wrap :
+            x[0]   = x[r]
+            x[r+1] = x[1]
+        else :
+            x[0]   = 0
+            x[r+1] = 0
+        x[r+2:] = 0 # Odd rows, below the block covered area
+
+        if self.wrap :
+            x[:, 0]   = x[:, c]
+            x[:, c+1] = x[:, 1]
+        else :
+            x[:, 0]   = 0
+            x[:, c+1] = 0
+        x[:, c+2:] = 0
+
+    #------------------------------------------------------------------------------------
+
+    def step(self, x):
+
+        er = self.even_rows
+        ec = self.even_cols
+
+        # Per row 4-cell nibbles at each block column (columns 2j..2j+3)
+        nib = (x[:, 0:ec:2] | (x[:, 1:ec+1:2] << 1) | (x[:, 2:ec+2:2] << 2) | (x[:, 3:ec+2:2] << 3)).astype(np.uint16)
+
+        # 4x4 neighborhood index per block (rows 2i..2i+3)
+        index = nib[0:er:2] | (nib[1:er+1:2] << 4) | (nib[2:er+2:2] << 8) | (nib[3:er+2:2] << 12)
+
+        out = self.table[index]
+
+        new = np.empty_like(x)
+        new[1:er+1:2, 1:ec+1:2] = out & 1
+        new[1:er+1:2, 2:ec+2:2] = (out >> 1) & 1
+        new[2:er+2:2, 1:ec+1:2] = (out >> 2) & 1
+        new[2:er+2:2, 2:ec+2:2] = out >> 3
+        self.fill_halo(new)
+
+        return new
@@ -1,60 +1,87 @@
+import numpy as np
 import argparse
 import os
+from cgol_pattern_loader import PATTERN_EXTS, load_pattern, load_pattern_file
 
 # Convert cgol binary picture to hex format.
+#
+# The grid is packed as a contiguous bit stream (row after row, LSB first as in sw/bit_array.h),
+# zero padded to whole 32-bit words, and written as ' %02x' bytes, height lines of equal byte count
+# (cgol_hex_in.txt), with '<name> <height> <width>' in cgol_conf.txt, as loaded by sw/cgol_shared_lib.c.
+#
+# Batch mode (-batch <dir>) converts all patterns of a directory in one run, to <out>/<name>.hex,
+# with one cgol_conf.txt entry line per pattern.
+# -bin also writes the same bytes as a raw binary image, for a single bulk memory load.
 
-ap = argparse.ArgumentParser(description='Convert cgol binary picture to hex format',formatter_class=argparse.RawTextHelpFormatter)
-ap.add_argument('pic', metavar='<inpat_name>', default=None, type=str, help='Input pattern name') 
-args = ap.parse_args()
-
-K5_SW_APPS_PATH = os.environ["K5_SW_APPS"].replace('/c/','c:/')
-pic_file = open(K5_SW_APPS_PATH + '/cgol_shared_lib/cgol_patterns/' + args.pic + '.txt','r')
-
-hex_file = open('cgol_hex_in.txt','w') ;
-conf_file = open('cgol_conf.txt','w') ;
-
-byte_val = 0
-bit_idx = 0
-bytes_list = []
-
-# Capture bytes
-total_bits = 0 
-for orig_line_count, line in enumerate(pic_file) :
-  for p in line[:-1] : # exclude eol
-    if p=='#' :
-      byte_val+= 1<<bit_idx
-    bit_idx+=1
-    if bit_idx==8 :
-       bytes_list.append(byte_val)
-       byte_val = 0
-       bit_idx  = 0
-       
-    if p in ['#','.'] :
-      total_bits +=1       
-       
-if len(line.split())>0 :
-  orig_line_count+=1       
-       
-# Generate hex file
-
-width = total_bits//orig_line_count
-
-# pad with zeros in case not word divided.
-if len(bytes_list)%4 != 0 :
-  for i in range (4-(len(bytes_list)%4)) :
-    bytes_list.append(0)
-        
-bytes_per_line = len(bytes_list)//orig_line_count
-gen_line_bytes_cnt = 0
-for byte in bytes_list :
-   hex_file.write(' %02x' % byte)
-   gen_line_bytes_cnt+=1
-   if gen_line_bytes_cnt >= bytes_per_line :
-      hex_file.write('\n')
-      gen_line_bytes_cnt = 0
-  
-conf_file.write('%s %d %d\n' %(args.pic, orig_line_count, width))
-  
-pic_file.close()
-hex_file.close()
-conf_file.close()
\ No newline at end of file
+#------------------------------------------------------------------------------------
+
+# Padded grid image bytes
+def grid_bytes(grid):
+
+    packed = np.packbits(np.asarray(grid, dtype=np.uint8).ravel(), bitorder='little')
+
+    # pad with zeros in case not word divided.
+    return np.concatenate([packed, np.zeros(-len(packed) % 4, dtype=np.uint8)])
+
+#------------------------------------------------------------------------------------
+
+# Hex image text, bytes spread on height lines
+def hex_text(image, height):
+
+    raw = image.tobytes()
+    bytes_per_line = max(1, len(raw) // height)
+
+    lines = []
+    for i in range(0, len(raw), bytes_per_line) :
+        chunk = raw[i:i+bytes_per_line]
+        lines.append(' ' + chunk.hex(' ') + ('\n' if len(chunk)==bytes_per_line else ''))
+
+    return ''.join(lines)
+
+#------------------------------------------------------------------------------------
+
+# Write hex (and optionally raw binary) image of grid, return its cgol_conf.txt entry
+def convert(name, grid, hex_file_name, bin_file_name=None):
+
+    height, width = grid.shape
+    image = grid_bytes(grid)
+
+    with open(hex_file_name, 'w') as hex_file :
+        hex_file.write(hex_text(image, height))
+
+    if bin_file_name is not None :
+        image.tofile(bin_file_name)
+
+    return '%s %d %d\n' % (name, height, width)
+
+#------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description='Convert cgol binary picture to hex format',formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument('pic', metavar='<inpat_name>', nargs='?', default=None, type=str, help='Input pattern name')
+    ap.add_argument('-batch', metavar='<dir>', type=str, default=None, help='Convert all patterns of directory (batch mode)')
+    ap.add_argument('-out', metavar='<dir>', type=str, default='.', help='Output directory')
+    ap.add_argument('-bin', action='store_true', help='Also write raw binary image (cgol_bin_in.bin, <name>.bin in batch mode)')
+    args = ap.parse_args()
+
+    if args.batch is None and args.pic is None :
+        ap.error('either <inpat_name> or -batch <dir> is required')
+
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.batch is None :
+        conf_entries = [convert(args.pic, load_pattern(args.pic), os.path.join(args.out, 'cgol_hex_in.txt'),
+                                os.path.join(args.out, 'cgol_bin_in.bin') if args.bin else None)]
+    else :
+        conf_entries = []
+        for f in sorted(os.listdir(args.batch)) :
+            name, ext = os.path.splitext(f)
+            if ext not in PATTERN_EXTS :
+                continue
+            conf_entries.append(convert(name, load_pattern_file(os.path.join(args.batch, f)), os.path.join(args.out, name + '.hex'),
+                                        os.path.join(args.out, name + '.bin') if args.bin else None))
+        print('Converted %d patterns to %s' % (len(conf_entries), args.out))
+
+    with open(os.path.join(args.out, 'cgol_conf.txt'), 'w') as conf_file :
+        conf_file.writelines(conf_entries)
@@ -0,0 +1,273 @@
+import numpy as np
+import glob
+import os
+import re
+from cgol_bit_grid import bit_grid_from_packed_rows
+
+#------------------------------------------------------------------------------------
+
+# Shared pattern loader (cgol_animate_ref, torus_animate, torus_animate_v2, batch check / regression).
+#
+# Supported pattern formats:
+#   .txt   - Native format, '#' alive '.' dead, one grid row per line
+#   .rle   - Run Length Encoded (x = m, y = n, rule = ... header, b/o/$ runs, '!' end), the header rule
+#            is returned by load_pattern_rule
+#   .cells - Plaintext, '!' comment lines, 'O' alive '.' dead, short lines padded with dead cells
+#
+# Text parsing is done on whole byte arrays (no per character Python loop). Parsers return the grid
+# as (rows, cols, packed rows), RLE runs are set directly into the packed rows so a large RLE pattern
+# never exists as a dense grid.
+# The parsed grid is compiled next to the pattern file (<pattern_file>.bin, 1 bit per cell, rows packed
+# to whole bytes, LSB first as in sw/bit_array.h) with the pattern file mtime and size in its header,
+# so subsequent loads only read the compiled file until the pattern changes.
+# load_pattern_bits returns the grid bit-packed (cgol_bit_grid), never holding it as a dense grid
+# once compiled, for grids beyond the hardware maximum size.
+
+#------------------------------------------------------------------------------------
+
+PATTERN_EXTS = ['.txt', '.rle', '.cells']
+
+COMPILED_MAGIC = 0x43474f4c50415432 # 'CGOLPAT2'
+
+#------------------------------------------------------------------------------------
+
+def patterns_dir():
+    K5_SW_APPS_PATH = os.environ["K5_SW_APPS"].replace('/c/','c:/')
+    return K5_SW_APPS_PATH + '/cgol_shared_lib/cgol_patterns'
+
+#------------------------------------------------------------------------------------
+
+# Resolve pattern name (or explicit file path) to its pattern file
+def pattern_file(pic):
+
+    if os.path.splitext(pic)[1] in PATTERN_EXTS and os.path.isfile(pic) :
+        return pic
+
+    for ext in PATTERN_EXTS :
+        file_name = os.path.join(patterns_dir(), pic + ext)
+        if os.path.isfile(file_name) :
+            return file_name
+
+    raise FileNotFoundError('Pattern %s not found in %s (%s)' % (pic, patterns_dir(), ', '.join(PATTERN_EXTS)))
+
+#------------------------------------------------------------------------------------
+
+# Sorted names of all patterns in the patterns directory
+def list_patterns():
+
+    pics = set()
+    for ext in PATTERN_EXTS :
+        pics.update(os.path.basename(f)[:-len(ext)] for f in glob.glob(patterns_dir() + '/*' + ext))
+
+    return sorted(pics)
+
+#------------------------------------------------------------------------------------
+
+# (rows, cols, packed rows) from text lines, alive_chars / cell_chars given as bytes
+def parse_lines(lines, alive_chars, cell_chars, keep_empty=False):
+
+    lines = [line.rstrip(b'\r') for line in lines]
+    if not keep_empty : # Only lines holding cells are grid rows
+        lines = [line for line in lines if any(c in line for c in cell_chars)]
+    else : # Drop trailing empty lines
+        while len(lines) > 0 and len(lines[-1].strip()) == 0 :
+            lines.pop()
+
+    if len(lines) == 0 :
+        return 0, 0, np.zeros((0, 0), dtype=np.uint8)
+
+    width = max(len(line) for line in lines)
+    chars = np.array(lines, dtype='S%d' % max(1, width)).view(np.uint8).reshape(len(lines), max(1, width))
+
+    # Columns beyond the last cell character of every row are not part of the grid
+    is_cell = np.isin(chars, np.frombuffer(cell_chars, dtype=np.uint8))
+    cols = int(np.flatnonzero(is_cell.any(axis=0)).max()) + 1 if is_cell.any() else 0
+
+    alive = np.isin(chars[:, :cols], np.frombuffer(alive_chars, dtype=np.uint8))
+    return len(lines), cols, np.packbits(alive, axis=1, bitorder='little')
+
+#------------------------------------------------------------------------------------
+
+def parse_txt(data):
+    return parse_lines(data.split(b'\n'), b'#', b'#.')
+
+#------------------------------------------------------------------------------------
+
+def parse_cells(data):
+    lines = [line for line in data.split(b'\n') if not line.startswith(b'!')]
+    return parse_lines(lines, b'Oo*', b'.Oo*', keep_empty=True)
+
+#------------------------------------------------------------------------------------
+
+# Rule of the RLE header (rule = ...), None when not given
+def rle_rule(data):
+
+    for line in data.decode('ascii', errors='replace').splitlines() :
+        line = line.strip()
+        if line.startswith('x') :
+            return dict(re.findall(r'(\w+)\s*=\s*([^,\s]+)', line)).get('rule')
+
+    return None
+
+#------------------------------------------------------------------------------------
+
+# (row, col, run length, alive) of each run in the RLE body, a new row ('$') starts with an empty dead run
+def rle_runs(body):
+
+    y = x = 0
+    for m in re.finditer(r'(\d*)([a-zA-Z$!])', body) :
+        count, tag = m.groups()
+        count = int(count) if count else 1
+        if tag == '!' :
+            break
+        if tag == '$' :
+            y += count
+            x = 0
+            yield y, 0, 0, False
+        else :
+            yield y, x, count, tag != 'b' # Any other cell state is alive
+            x += count
+
+#------------------------------------------------------------------------------------
+
+def parse_rle(data):
+
+    width = height = None
+    body = []
+    for line in data.decode('ascii', errors='replace').splitlines() :
+        line = line.strip()
+        if line.startswith('#') or len(line) == 0 :
+            continue
+        if line.startswith('x') and width is None :
+            header = dict(re.findall(r'(\w+)\s*=\s*([^,\s]+)', line))
+            width, height = int(header['x']), int(header['y'])
+            continue
+        body.append(line)
+        if '!' in line :
+            break
+
+    body = ''.join(body)
+
+    if width is None : # No header, size from content
+        width = rows = 0
+        for y, x, count, alive in rle_runs(body) :
+            width = max(width, x + count)
+            rows = y + 1
+        height = rows if width > 0 else 0
+
+    # Set each alive run's bits (LSB first) directly in the packed rows: partial first byte, whole bytes,
+    # partial last byte
+    packed_rows = np.zeros((height, (width + 7) // 8), dtype=np.uint8)
+    for y, x, count, alive in rle_runs(body) :
+        count = min(count, width - x) # Runs beyond the header size are clipped
+        if not alive or y >= height or count <= 0 :
+            continue
+        first, last = x >> 3, (x + count - 1) >> 3
+        first_mask = (0xff << (x & 7)) & 0xff
+        last_mask = 0xff >> (7 - ((x + count - 1) & 7))
+        if first == last :
+            packed_rows[y, first] |= first_mask & last_mask
+        else :
+            packed_rows[y, first] |= first_mask
+            packed_rows[y, first+1:last] = 0xff
+            packed_rows[y, last] |= last_mask
+
+    return height, width, packed_rows
+
+#------------------------------------------------------------------------------------
+
+PARSERS = {'.txt': parse_txt, '.rle': parse_rle, '.cells': parse_cells}
+
+#------------------------------------------------------------------------------------
+
+def compiled_file(file_name):
+    return file_name + '.bin'
+
+#------------------------------------------------------------------------------------
+
+# Compiled (rows, cols, packed rows), or None when missing or stale
+def read_compiled(file_name, st):
+
+    try :
+        raw = np.fromfile(compiled_file(file_name), dtype=np.uint8)
+    except OSError :
+        return None
+
+    if raw.size < 40 :
+        return None
+
+    magic, rows, cols, mtime_ns, size = raw[:40].view(np.int64)
+    if magic != COMPILED_MAGIC or mtime_ns != st.st_mtime_ns or size != st.st_size :
+        return None
+
+    return int(rows), int(cols), raw[40:].reshape(int(rows), (int(cols) + 7) // 8)
+
+#------------------------------------------------------------------------------------
+
+def write_compiled(file_name, st, rows, cols, packed_rows):
+
+    header = np.array([COMPILED_MAGIC, rows, cols, st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+    # Write to a temporary file then rename, so concurrent loaders never see a partial file.
+    tmp_file_name = '%s.%d.tmp' % (compiled_file(file_name), os.getpid())
+    try :
+        with open(tmp_file_name, 'wb') as f :
+            f.write(header.tobytes())
+            f.write(packed_rows.tobytes())
+        os.replace(tmp_file_name, compiled_file(file_name))
+    except OSError : # Read-only pattern library, just skip compiling
+        if os.path.exists(tmp_file_name) :
+            os.remove(tmp_file_name)
+
+#------------------------------------------------------------------------------------
+
+# Parse pattern file to (rows, cols, packed rows), using (and refreshing) its compiled form when compiled is set
+def load_packed_rows(file_name, compiled=True):
+
+    st = os.stat(file_name)
+    if compiled :
+        packed = read_compiled(file_name, st)
+        if packed is not None :
+            return packed
+
+    with open(file_name, 'rb') as f :
+        data = f.read()
+
+    rows, cols, packed_rows = PARSERS[os.path.splitext(file_name)[1]](data)
+
+    if compiled :
+        write_compiled(file_name, st, rows, cols, packed_rows)
+
+    return rows, cols, packed_rows
+
+#------------------------------------------------------------------------------------
+
+# Dense start grid (int 0/1 array) of pattern file
+def load_pattern_file(file_name, compiled=True):
+
+    rows, cols, packed_rows = load_packed_rows(file_name, compiled)
+    return np.unpackbits(packed_rows, axis=1, bitorder='little')[:, :cols].astype(int)
+
+#------------------------------------------------------------------------------------
+
+# Dense start grid (int 0/1 array) of pattern name or file
+def load_pattern(pic, compiled=True):
+    return load_pattern_file(pattern_file(pic), compiled)
+
+#------------------------------------------------------------------------------------
+
+# Bit-packed start grid (cgol_bit_grid) of pattern name or file
+def load_pattern_bits(pic, compiled=True):
+    return bit_grid_from_packed_rows(*load_packed_rows(pattern_file(pic), compiled))
+
+#------------------------------------------------------------------------------------
+
+# Rule given by the pattern file (RLE header), None when not given
+def load_pattern_rule(pic):
+
+    file_name = pattern_file(pic)
+    if os.path.splitext(file_name)[1] != '.rle' :
+        return None
+
+    with open(file_name, 'rb') as f :
+        return rle_rule(f.read())
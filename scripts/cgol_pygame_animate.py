@@ -3,6 +3,7 @@ import pygame
 import time
 import sys
 import os
+import threading
 
 if 'K5_ENV' in os.environ : # RC3 case
   sys.path.append(os.environ['MY_K5_PROJ']+'/sw/apps/cgol_shared_lib')
@@ -10,12 +11,15 @@ else : # FPGA win env case
   sys.path.append(os.environ['K5_XBOX_FPGA']+'/sw/apps/cgol_shared_lib')
 
 import cgol_animate_shared as sas
+from cgol_pygame_render import cgol_grid_renderer
+from cgol_bit_grid import display_shape, downsample
+from cgol_shm_grid import cgol_shm_grid
 
 #------------------------------------------------------------------------------------- 
 
 class cgol_pygame_animate :
       
-    def __init__(self, rows, cols, grid_soc_addr, k5s, thread_id):
+    def __init__(self, rows, cols, grid_soc_addr, k5s, thread_id, dirty=False, pipeline=False, shm_name=None):
    
       self.k5s = k5s
       self.thread_id = thread_id
@@ -33,10 +37,28 @@ class cgol_pygame_animate :
       
       self.grid = np.zeros((self.rows,self.cols))
       
-      self.CELL_SIZE = int(640/max(self.cols,self.rows))
+      self.dirty = dirty # Incremental readback, only changed rows are decoded and redrawn
+      self.prev_grid_chunks = None
+      self.changed_rows = None # Changed rows mask of last readback (None when all rows read)
       
-      self.WINDOW_WIDTH  = self.CELL_SIZE * self.cols
-      self.WINDOW_HEIGHT = self.CELL_SIZE * self.rows + 30  # extra space for text
+      # Readback/render overlap: a readback thread reads generation itr from the target into one of two
+      # preallocated frame buffers while display_grid draws generation itr-1 from the other one on the
+      # calling thread, which keeps the pygame display and events (SDL needs them on the main thread).
+      # The target only advances after display_grid returns, so each call still waits for its own readback
+      # and the display lags one generation behind; no frames are queued or dropped.
+      self.pipeline = pipeline
+      self.readback_thread = None
+      
+      # Out-of-process rendering: display_grid only reads back into a shared memory grid buffer,
+      # rendered by cgol_shm_view.py <shm_name> in another process.
+      self.shm_grid = cgol_shm_grid(rows, cols, shm_name) if shm_name is not None else None
+      
+      # Grids larger than the window are downsampled to disp_rows x disp_cols displayed cells
+      self.CELL_SIZE, self.disp_rows, self.disp_cols = display_shape(self.rows, self.cols, 640)
+      self.downsampled = (self.disp_rows, self.disp_cols) != (self.rows, self.cols)
+      
+      self.WINDOW_WIDTH  = self.CELL_SIZE * self.disp_cols
+      self.WINDOW_HEIGHT = self.CELL_SIZE * self.disp_rows + 30  # extra space for text
       self.FPS = 1
       
       # Colors        
@@ -45,6 +67,8 @@ class cgol_pygame_animate :
       self.ALIVE_COLOR = (255, 255,   0)   # Bright yellow live cells
       self.TEXT_COLOR  = (200, 200, 200)
       
+      self.renderer = None # Blit based grid renderer, created on first draw
+      
       self.screen = None
       self.clock = None    
       self.font = None 
@@ -73,14 +97,43 @@ class cgol_pygame_animate :
     
     def display_grid(self, itr, block, animate, val_str):
                 
+        if (self.shm_grid is not None) and animate and not block :
+            sas.publish_grid(self, itr)
+            return
+            
+        if self.pipeline and animate and not block :
+            if self.readback_thread is None :
+                self.start_pipeline()
+            if not self.disp_init_done :
+                self.init_display()
+            self.request_frame(itr)
+            self.render_frame() # Previous generation, meanwhile generation itr is read back
+            self.wait_frame()
+            return
+            
+        if self.readback_thread is not None : # Last generation, stop readback thread
+            self.stop_pipeline()
+            
         if animate and not self.disp_init_done :
             self.init_display()
             
-        sas.get_grid(self,self.grid)        
+        if self.dirty and animate and not block :
+           self.changed_rows = sas.get_grid_dirty(self,self.grid,itr)
+        else :
+           sas.get_grid(self,self.grid,itr)        
+           self.changed_rows = None
                                                                   
         # self.clock.tick(self.FPS)
 
-        if not block :                                    
+        if not block and (self.changed_rows is not None) and (not self.changed_rows.all()) :
+           # Redraw and update only changed rows and the generation text
+           text_rect = pygame.Rect(0, 0, self.WINDOW_WIDTH, 30)
+           self.screen.fill(self.BG_COLOR, text_rect)
+           self.draw_generation(itr)
+           dirty_rects = [text_rect] + self.draw_grid_rows(self.disp_grid(self.grid), self.disp_changed_rows(self.changed_rows))
+           pygame.display.update(dirty_rects)
+           
+        elif not block :                                    
            self.screen.fill(self.BG_COLOR)
            self.draw_generation(itr)
            self.draw_grid(self.grid)        
@@ -90,27 +143,127 @@ class cgol_pygame_animate :
  
            pygame.quit()
            
+           if self.shm_grid is not None : # Last generation published, out-of-process viewers stop
+              self.shm_grid.close()
+              self.shm_grid = None
+           
 
            ref = sas.check_grid(self,itr) # Check Correctness of final grid
                     
            sas.save_ref_grid_img(self,ref,val_str) 
               
                  
+    #------------------------------------------------------------------------------------
+
+    def start_pipeline(self):
+
+      self.frames = [np.zeros((self.rows,self.cols)) for i in range(2)] # One read back while the other is drawn
+      self.frame_itr = [0, 0]
+      self.read_slot = 0 # Frame buffer of the current readback
+      self.draw_slot = None # Read back frame not drawn yet
+      self.read_request = None # Generation to read back
+      self.readback_cond = threading.Condition()
+      self.readback_stop = False
+
+      self.readback_thread = threading.Thread(target=self.readback_loop, daemon=True)
+      self.readback_thread.start()
+
+    #------------------------------------------------------------------------------------
+
+    # Start the readback of generation itr (called per generation by the target)
+    def request_frame(self, itr):
+
+      with self.readback_cond :
+        self.read_request = itr
+        self.readback_cond.notify_all()
+
+    # Wait for the requested readback, the target grid memory must not change before.
+    # The read back frame is drawn by the next render_frame, the next readback uses the other buffer.
+    def wait_frame(self):
+
+      with self.readback_cond :
+        while self.read_request is not None :
+          self.readback_cond.wait()
+
+      self.draw_slot = self.read_slot
+      self.read_slot = 1 - self.read_slot
+
+    #------------------------------------------------------------------------------------
+
+    # Readback thread, reads the requested generation into the read frame buffer, no pygame calls
+    def readback_loop(self):
+
+      while True :
+        with self.readback_cond :
+          while self.read_request is None and not self.readback_stop :
+            self.readback_cond.wait()
+          if self.read_request is None : # stopped and no pending request
+            break
+          itr = self.read_request
+
+        sas.get_grid(self,self.frames[self.read_slot],itr) # Outside the lock, the main thread draws meanwhile
+        self.frame_itr[self.read_slot] = itr
+
+        with self.readback_cond :
+          self.read_request = None
+          self.readback_cond.notify_all()
+
+    #------------------------------------------------------------------------------------
+
+    # Draw the last read back frame, if not drawn yet (on the thread owning the pygame display)
+    def render_frame(self):
+
+      if self.draw_slot is None :
+        return
+      slot = self.draw_slot
+      self.draw_slot = None
+
+      pygame.event.pump()
+      self.screen.fill(self.BG_COLOR)
+      self.draw_generation(self.frame_itr[slot])
+      self.draw_grid(self.frames[slot])
+      pygame.display.flip()
+
+    #------------------------------------------------------------------------------------
+
+    def stop_pipeline(self):
+
+      with self.readback_cond :
+        self.readback_stop = True
+        self.readback_cond.notify_all()
+
+      self.readback_thread.join()
+      self.readback_thread = None
+      self.render_frame() # Last read back frame
+
+    #------------------------------------------------------------------------------------
+    
+    # Grid as displayed, downsampled (any alive cell per block) when larger than the window
+    def disp_grid(self, grid):
+        return downsample(grid, self.disp_rows, self.disp_cols) if self.downsampled else grid
+    
+    #------------------------------------------------------------------------------------
+    
+    # Displayed rows holding changed grid rows
+    def disp_changed_rows(self, changed_rows):
+        if self.downsampled :
+            changed_rows = np.logical_or.reduceat(changed_rows, np.arange(self.disp_rows) * self.rows // self.disp_rows)
+        return np.flatnonzero(changed_rows)
+    
     #------------------------------------------------------------------------------------
     
     # Draw grid and cells
     def draw_grid(self, grid):
-        for y in range(self.rows):
-            for x in range(self.cols):
-                color = self.ALIVE_COLOR if grid[y, x] == 1 else self.BG_COLOR
-                rect = pygame.Rect(x * self.CELL_SIZE, y * self.CELL_SIZE + 30, self.CELL_SIZE, self.CELL_SIZE)
-                pygame.draw.rect(self.screen, color, rect)
+        if self.renderer is None :
+            self.renderer = cgol_grid_renderer(self.disp_rows, self.disp_cols, self.CELL_SIZE, 30,
+                                               self.BG_COLOR, self.ALIVE_COLOR, self.GRID_COLOR)
+        self.renderer.draw(self.screen, self.disp_grid(grid))
+    
+    #------------------------------------------------------------------------------------
     
-        # Draw grid lines
-        for x in range(0, self.cols * self.CELL_SIZE, self.CELL_SIZE):
-            pygame.draw.line(self.screen, self.GRID_COLOR, (x, 30), (x, self.WINDOW_HEIGHT))
-        for y in range(30, self.rows * self.CELL_SIZE + 30, self.CELL_SIZE):
-            pygame.draw.line(self.screen, self.GRID_COLOR, (0, y), (self.WINDOW_WIDTH, y))
+    # Draw only given displayed grid rows (cells and grid lines) over the last drawn grid, returns the updated screen rects
+    def draw_grid_rows(self, grid, rows):
+        return self.renderer.draw_rows(self.screen, grid, rows)
     
     #------------------------------------------------------------------------------------
     
@@ -0,0 +1,99 @@
+import numpy as np
+import pygame
+from cgol_frame_export import show_grid_lines
+
+#------------------------------------------------------------------------------------
+
+# Blit based pygame grid renderer (shared by cgol_pygame_animate and cgol_animate_ref).
+#
+# The grid is written as palette indexes into a 1 pixel per cell 8-bit surface,
+# scaled once per frame to the cell size (nearest neighbour) and blitted,
+# then a pre-rendered grid lines surface (cached per window size) is overlaid.
+# This replaces one pygame.draw.rect per cell and one draw.line per grid line.
+
+#------------------------------------------------------------------------------------
+
+class cgol_grid_renderer :
+
+    line_surf_cache = {} # (width, height, cell_size, grid_color) -> grid lines surface
+
+    KEY_COLOR = (255, 0, 255) # Transparent color of the grid lines surface
+
+    def __init__(self, rows, cols, cell_size, top, bg_color, alive_color, grid_color):
+
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.top = top # Vertical offset of the grid in the target surface (text area)
+
+        self.width  = cols * cell_size
+        self.height = rows * cell_size
+        self.grid_color = grid_color
+
+        self.cell_surf = pygame.Surface((cols, rows), depth=8)
+        self.cell_surf.set_palette([bg_color, alive_color] + [bg_color] * 254)
+
+        self.scaled_surf = None
+
+    #------------------------------------------------------------------------------------
+
+    # Grid lines surface, drawn once per window size
+    def line_surface(self):
+
+        key = (self.width, self.height, self.cell_size, self.grid_color)
+        line_surf = self.line_surf_cache.get(key)
+
+        if line_surf is None :
+            line_surf = pygame.Surface((self.width, self.height))
+            line_surf.fill(self.KEY_COLOR)
+            line_surf.set_colorkey(self.KEY_COLOR)
+            for x in range(0, self.width, self.cell_size):
+                pygame.draw.line(line_surf, self.grid_color, (x, 0), (x, self.height))
+            for y in range(0, self.height, self.cell_size):
+                pygame.draw.line(line_surf, self.grid_color, (0, y), (self.width, y))
+            self.line_surf_cache[key] = line_surf
+
+        return line_surf
+
+    #------------------------------------------------------------------------------------
+
+    # Draw grid cells and grid lines into surface
+    def draw(self, surface, grid):
+
+        pygame.surfarray.blit_array(self.cell_surf, (np.asarray(grid)[:self.rows, :self.cols] == 1).T.astype(np.uint8))
+
+        if self.scaled_surf is None :
+            self.scaled_surf = pygame.transform.scale(self.cell_surf, (self.width, self.height))
+        else :
+            pygame.transform.scale(self.cell_surf, (self.width, self.height), self.scaled_surf)
+
+        surface.blit(self.scaled_surf, (0, self.top))
+        if show_grid_lines(self.cell_size) :
+            surface.blit(self.line_surface(), (0, self.top))
+
+    #------------------------------------------------------------------------------------
+
+    # Draw only displayed grid rows (sorted) into surface, after a full draw of the previous grid.
+    # The rows are written into the cell surface, each run of adjacent rows is scaled and blitted
+    # with its grid lines area. Returns the updated surface rects.
+    def draw_rows(self, surface, grid, rows):
+
+        rows = np.asarray(rows, dtype=int)
+        if len(rows) == 0 :
+            return []
+
+        cells = pygame.surfarray.pixels2d(self.cell_surf)
+        cells[:, rows] = (np.asarray(grid)[rows, :self.cols] == 1).T
+        del cells # Unlock the cell surface
+
+        rects = []
+        for run in np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1) :
+            area = pygame.Rect(0, int(run[0]) * self.cell_size, self.width, len(run) * self.cell_size)
+            scaled = pygame.transform.scale(self.cell_surf.subsurface((0, int(run[0]), self.cols, len(run))), area.size)
+            dest = area.move(0, self.top)
+            surface.blit(scaled, dest)
+            if show_grid_lines(self.cell_size) :
+                surface.blit(self.line_surface(), dest, area)
+            rects.append(dest)
+
+        return rects
@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import time
 import sys
 import os
@@ -9,7 +10,7 @@ import cgol_animate_shared as sas
 
 class cgol_pyplot_animate :
       
-    def __init__(self, rows, cols, grid_soc_addr, k5s):
+    def __init__(self, rows, cols, grid_soc_addr, k5s, retained=True):
     
       self.k5s  = k5s
       self.rows = rows
@@ -26,11 +27,95 @@ class cgol_pyplot_animate :
       self.cols_tick_indexes = np.arange(0.5,self.cols,cols_tick_freq)
       self.cols_tick_labels = np.arange(0,self.cols,cols_tick_freq)            
              
-      self.plt_ticks_setup()  # TODO: Not sure why this needs to be called every display update      
-      self.set_grid_lines()       
+      # Retained mode: a single imshow artist and grid lines LineCollection are created once,
+      # each generation only updates the image data and blits the changed artists.
+      self.retained = retained
+      self.fig = None
+      self.ax = None
+      self.image = None
+      self.grid_lines = None
+      self.title = None
+      self.background = None
+      
+      if self.retained :
+        self.init_retained()
+      else :
+        self.plt_ticks_setup()  # TODO: Not sure why this needs to be called every display update      
+        self.set_grid_lines()       
       self.display_grid(itr=0, block=False)
 
     #-------------------------------------------------------------------------------------    
+
+    def init_retained(self):
+
+      self.fig, self.ax = plt.subplots()
+      self.plt_ticks_setup()
+
+      self.image = self.ax.imshow(self.crnt_grid, cmap='binary', vmin=0, vmax=1, interpolation='nearest',
+                                  extent=(0, self.cols, self.rows, 0), animated=True) # rows displayed from top to bottom
+      self.ax.set_aspect('equal')  # Ensures square pixels
+
+      DISPLAY_GRID_LINES = (self.rows <= 128) and (self.cols <= 128)
+      if DISPLAY_GRID_LINES :
+        segments  = [[(0, y), (self.cols, y)] for y in range(self.rows + 1)]
+        segments += [[(x, 0), (x, self.rows)] for x in range(self.cols + 1)]
+        self.grid_lines = LineCollection(segments, colors='gray', linewidths=0.5, animated=True)
+        self.ax.add_collection(self.grid_lines)
+
+      self.title = self.ax.set_title("Generation 0", animated=True)
+
+      plt.show(block=False)
+      plt.pause(0.001)
+      self.fig.canvas.mpl_connect('draw_event', self.on_draw) # Re-capture background on resize/redraw
+      self.fig.canvas.draw()
+
+    #-------------------------------------------------------------------------------------    
+
+    def on_draw(self, event):
+      if self.fig.canvas.supports_blit :
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+      self.draw_animated()
+
+    #-------------------------------------------------------------------------------------    
+
+    def draw_animated(self):
+      self.fig.draw_artist(self.image)
+      if self.grid_lines is not None :
+        self.fig.draw_artist(self.grid_lines)
+      self.fig.draw_artist(self.title)
+
+    #-------------------------------------------------------------------------------------    
+
+    def display_grid_retained(self, itr, block):
+
+      sas.get_grid(self,self.crnt_grid)
+
+      self.image.set_data(self.crnt_grid)
+      self.title.set_text("Generation %d" % itr)
+
+      if block : # Final static display, artists drawn normally
+        for artist in [self.image, self.grid_lines, self.title] :
+          if artist is not None :
+            artist.set_animated(False)
+        self.fig.canvas.draw_idle()
+        plt.show(block=True)
+      elif self.background is not None :
+        self.fig.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.fig.canvas.blit(self.fig.bbox)
+        self.fig.canvas.flush_events()
+      else : # Backend without blitting support
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
+
+      # Swap current and next grid np references
+      prev_crnt_grid = self.crnt_grid
+      self.crnt_grid = self.next_grid
+      self.next_grid = prev_crnt_grid
+
+      return 1 # Indicates 'done'
+
+    #-------------------------------------------------------------------------------------    
    
     def set_grid_lines(self):
      # display grid lines     
@@ -52,6 +137,9 @@ class cgol_pyplot_animate :
     #-------------------------------------------------------------------------------------    
     
     def display_grid(self, itr, block):
+    
+      if self.retained :
+        return self.display_grid_retained(itr, block)
              
       plt.title("Generation %d" % itr)   
 
@@ -0,0 +1,216 @@
+import numpy as np
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import types
+import cgol_animate_ref as sar
+from cgol_batch_check import load_dump, load_start_grid
+from cgol_pattern_loader import list_patterns
+
+#------------------------------------------------------------------------------------
+
+# Invocation Example:
+# Cloud: python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_regress.py -itr 1000 100000 -wrap both -j 32 -json regress.json
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_regress.py cgol_64x64_edna -itr 1001 -wrap on -dumps hw_dumps -engine swar
+
+# Regression runner for hardware-vs-reference verification.
+# Every (pattern, itr, wrap) job runs cgol_animate.update_grid_num_itr in a process pool worker.
+# Start grids are parsed once by the parent and handed to each worker at start-up,
+# the summary (per job status and timing) is written as JSON.
+
+#------------------------------------------------------------------------------------
+
+worker_start_grids = None # Per worker process, pattern name -> parsed start grid
+
+def init_worker(start_grids):
+    global worker_start_grids
+    worker_start_grids = start_grids
+
+#------------------------------------------------------------------------------------
+
+# Failed job result (any exception of the job or its worker), the run goes on with the other jobs
+def error_result(job, e, elapsed_sec=0.0):
+
+    result = dict(job)
+    result.pop('dump', None)
+    result['elapsed_sec'] = elapsed_sec
+    result['status'] = 'ERROR'
+    result['log'] = '%s: %s' % (type(e).__name__, e)
+    return result
+
+#------------------------------------------------------------------------------------
+
+# Run a single job in a worker, returns the job result dict.
+def run_job(job):
+
+    start_time = time.perf_counter()
+    try :
+        return check_job(job)
+    except Exception as e : # e.g. engine not supporting the boundary mode, bad pattern or dump file, cache OSError, MemoryError
+        return error_result(job, e, time.perf_counter() - start_time)
+
+#------------------------------------------------------------------------------------
+
+def check_job(job):
+
+    args = types.SimpleNamespace()
+    args.pic        = job['pic']
+    args.itr        = job['itr']
+    args.fps        = 10
+    args.wrap       = job['wrap']
+    args.fftl       = True
+    args.engine     = job['engine']
+    args.cache      = job['cache']
+    args.cycle      = job['cycle']
+    args.rule       = job['rule']
+    args.start_grid = worker_start_grids[job['pic']]
+
+    result = dict(job)
+    result.pop('dump', None)
+
+    log = io.StringIO()
+    start_time = time.perf_counter()
+
+    with contextlib.redirect_stdout(log) : # Keep worker checker prints off the shared console
+        ref = sar.cgol_animate(args)
+        ref.update_grid_num_itr()
+
+    result['elapsed_sec'] = time.perf_counter() - start_time
+    result['live_cells']  = int(ref.grid.sum())
+    result['log']         = log.getvalue().strip()
+
+    if job['dump'] is None :
+        result['status'] = 'REF'
+    elif not os.path.exists(job['dump']) :
+        result['status'] = 'MISSING'
+    else :
+        checked_grid = load_dump(job['dump'])
+        match = np.array_equal(ref.grid.to_dense() if ref.bit_grid else ref.grid, checked_grid)
+        result['status'] = 'PASS' if match else 'FAIL'
+
+    return result
+
+#------------------------------------------------------------------------------------
+
+class cgol_regress :
+
+    def __init__(self, args):
+
+        self.args = args
+        self.jobs = []
+        self.results = []
+        self.start_grids = {}
+
+    #------------------------------------------------------------------------------------
+
+    def build_jobs(self):
+
+        pics = self.args.pics
+        if len(pics)==0 :
+            pics = list_patterns()
+
+        wraps = {'off': [False], 'on': [True], 'both': [False, True]}[self.args.wrap]
+
+        for pic in pics :
+            self.start_grids[pic] = load_start_grid(pic)
+            for wrap in wraps :
+                for itr in self.args.itr :
+                    dump = None
+                    if self.args.dumps is not None :
+                        dump = '%s/%s_%d%s.txt' % (self.args.dumps, pic, itr, '_wrap' if wrap else '')
+                    self.jobs.append({'pic': pic, 'itr': itr, 'wrap': wrap, 'engine': self.args.engine,
+                                      'cache': self.args.cache, 'cycle': self.args.cycle, 'rule': self.args.rule, 'dump': dump})
+
+    #------------------------------------------------------------------------------------
+
+    def run(self):
+
+        self.build_jobs()
+
+        print('Running %d jobs on %d workers ...' % (len(self.jobs), self.args.j), flush=True)
+        start_time = time.perf_counter()
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.args.j, initializer=init_worker,
+                                                    initargs=(self.start_grids,)) as pool :
+            futures = {pool.submit(run_job, job): job for job in self.jobs}
+            for future in concurrent.futures.as_completed(futures) :
+                try :
+                    result = future.result()
+                except Exception as e : # Worker process lost (e.g. killed out of memory)
+                    result = error_result(futures[future], e)
+                self.results.append(result)
+                print('%-7s %-28s %-8s itr %-8d %8.3f sec' % (result['status'], result['pic'],
+                      'wrap' if result['wrap'] else 'non-wrap', result['itr'], result['elapsed_sec']), flush=True)
+
+        self.elapsed_sec = time.perf_counter() - start_time
+
+        # Report in job order, not completion order
+        order = {(job['pic'], job['itr'], job['wrap']): i for i, job in enumerate(self.jobs)}
+        self.results.sort(key=lambda r: order[(r['pic'], r['itr'], r['wrap'])])
+
+    #------------------------------------------------------------------------------------
+
+    def summary(self):
+
+        counts = {}
+        for result in self.results :
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+
+        return {'num_jobs'    : len(self.results),
+                'num_workers' : self.args.j,
+                'elapsed_sec' : self.elapsed_sec,
+                'counts'      : counts,
+                'jobs'        : self.results}
+
+    #------------------------------------------------------------------------------------
+
+    def report(self):
+
+        summary = self.summary()
+
+        if self.args.json is not None :
+            with open(self.args.json, 'w') as json_f :
+                json.dump(summary, json_f, indent=2)
+            print('Summary written to %s' % self.args.json)
+
+        num_fail = sum(summary['counts'].get(status, 0) for status in ['FAIL', 'MISSING', 'ERROR'])
+        print('\n%d jobs in %.3f seconds: %s' % (summary['num_jobs'], summary['elapsed_sec'],
+              ', '.join('%s %d' % kv for kv in sorted(summary['counts'].items()))))
+
+        if num_fail==0 :
+            print('\n\nGREAT, All regression jobs passed\n')
+        else :
+            print('\n\nERROR, %d regression jobs failed\n' % num_fail)
+
+        return num_fail
+
+#----------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description='Cgol Regression',formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument('pics', metavar='<inpat_name>', nargs='*', type=str, help='Input pattern names (default all patterns)')
+    ap.add_argument('-itr', metavar='<num_itr>', nargs='+', type=int, default=[0], help='Numbers of iterations (generations)')
+    ap.add_argument('-wrap', metavar='<mode>', type=str, default='both', choices=['off','on','both'],
+                    help='Wrap Mode: off (cgol_xlr), on (cgol_xlr_tor) or both')
+    ap.add_argument('-engine', metavar='<engine>', type=str, default='swar', choices=['conv','swar','hashlife','sparse','lut'], help='Reference stepping engine')
+    ap.add_argument('-cycle', metavar='<mode>', type=str, default='brent', choices=['hash','brent'], help='Cycle detection mode')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default='B3/S23', help='Life-like rule of the checked target (B/S notation)')
+    ap.add_argument('-cache', metavar='<dir>', type=str, default=None, help='Persistent generation cache directory')
+    ap.add_argument('-dumps', metavar='<dir>', type=str, default=None,
+                    help='Hardware dumps directory, files named <inpat_name>_<num_itr>[_wrap].txt')
+    ap.add_argument('-j', metavar='<num_workers>', type=int, default=os.cpu_count(), help='Number of worker processes')
+    ap.add_argument('-json', metavar='<file>', type=str, default=None, help='JSON summary output file')
+
+    args = ap.parse_args()
+
+    regress = cgol_regress(args)
+    regress.run()
+    num_fail = regress.report()
+
+    sys.exit(1 if num_fail else 0)
@@ -0,0 +1,84 @@
+import numpy as np
+import re
+
+#------------------------------------------------------------------------------------
+
+# Life-like cellular automaton rule in B/S notation.
+#
+# Accepted forms: 'B3/S23' (Conway), 'B36/S23' (HighLife), 'B3678/S34678' (Day & Night),
+# also without slash or lowercase ('b3s23'), 'S23/B3', and the old S/B digits form ('23/3').
+#
+# The rule is compiled into a lookup table indexed by 9*state + live neighbors (0..17),
+# so the next state of a whole grid is a single vectorized gather (lut[index]). The index is
+# the neighborhood sum with the center cell weighted 9, e.g. one convolution with a 9 center kernel.
+
+#------------------------------------------------------------------------------------
+
+CONWAY = 'B3/S23'
+
+#------------------------------------------------------------------------------------
+
+# Parse rule text to (birth counts, survive counts) tuples
+def parse_bs(text):
+
+    spec = text.replace(' ', '').upper().split(':')[0] # Drop a Golly bounded grid suffix (B3/S23:T64,64)
+
+    m = re.fullmatch(r'B([0-8]*)/?S([0-8]*)', spec)
+    if m is not None :
+        birth, survive = m.groups()
+    else :
+        m = re.fullmatch(r'S([0-8]*)/?B([0-8]*)', spec) or re.fullmatch(r'([0-8]*)/([0-8]*)', spec)
+        if m is None :
+            raise ValueError('Invalid rule %s, expected B/S notation such as B3/S23' % text)
+        survive, birth = m.groups()
+
+    return tuple(sorted(set(int(c) for c in birth))), tuple(sorted(set(int(c) for c in survive)))
+
+#------------------------------------------------------------------------------------
+
+class cgol_rule :
+
+    def __init__(self, text=CONWAY):
+
+        self.birth, self.survive = parse_bs(text)
+        self.text = 'B%s/S%s' % (''.join(map(str, self.birth)), ''.join(map(str, self.survive)))
+
+        # lut[9*state + neighbors] -> next state
+        self.lut = np.zeros(18, dtype=np.uint8)
+        self.lut[list(self.birth)] = 1
+        self.lut[[9 + n for n in self.survive]] = 1
+
+        # Table packed as bits, next state = (lut_mask >> index) & 1 (no gather index conversion)
+        self.lut_mask = np.uint32(sum(1 << int(i) for i in np.flatnonzero(self.lut)))
+
+        self.is_conway = (self.text == CONWAY)
+
+        # Dead cells with no live neighbors are born (B0), empty space does not stay empty
+        self.births_on_empty = (0 in self.birth)
+
+    #------------------------------------------------------------------------------------
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        return isinstance(other, cgol_rule) and (self.text == other.text)
+
+    def __hash__(self):
+        return hash(self.text)
+
+    #------------------------------------------------------------------------------------
+
+    # Next state of cells from their state and live neighbor count (arrays of the same shape)
+    def apply(self, state, neighbors):
+        return self.lut[9 * state + neighbors]
+
+#------------------------------------------------------------------------------------
+
+# Rule from text, rule object (returned as is) or None (Conway)
+def get_rule(rule):
+
+    if isinstance(rule, cgol_rule) :
+        return rule
+
+    return cgol_rule(CONWAY if rule is None else rule)
@@ -0,0 +1,168 @@
+import numpy as np
+import sys
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+#------------------------------------------------------------------------------------
+
+# Shared memory grid buffer between the readback process and out-of-process viewers / checker.
+#
+# The readback writes the grid once per generation, as the raw bit stream read from the target
+# (1 bit per cell LSB first, see sw/bit_array.h), into a named multiprocessing.shared_memory block.
+# Readers in other processes attach by name and map the same memory (no pipe, no pickling).
+#
+# Layout: int64 header [magic, rows, cols, seq, gen, closed, num_bytes, 0] followed by the grid bytes.
+# A seqlock guards the grid bytes: the single writer makes seq odd while writing and even when done,
+# a reader copies the bytes and retries if seq was odd or changed meanwhile, so it never sees a torn frame.
+#
+# read_tcm_block makes an attached buffer usable as the k5s session of any viewer class
+# (cgol_pygame_animate, cgol_terminal_animate), the viewer then reads back from shared memory.
+
+#------------------------------------------------------------------------------------
+
+SHM_MAGIC = 0x43474f4c53484d31 # 'CGOLSHM1'
+
+HEADER_WORDS = 8
+HEADER_BYTES = HEADER_WORDS * 8
+
+MAGIC, ROWS, COLS, SEQ, GEN, CLOSED, NUM_BYTES = range(7)
+
+#------------------------------------------------------------------------------------
+
+class cgol_shm_grid :
+
+    # Create (rows, cols given) or attach to (name only) a shared memory grid buffer
+    def __init__(self, rows=None, cols=None, name=None):
+
+        self.owner = rows is not None
+
+        if self.owner :
+            num_bytes = (rows * cols + 7) // 8
+            size = HEADER_BYTES + ((num_bytes + 3) // 4) * 4 # Whole 32-bit words for read_tcm_block
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        elif sys.version_info >= (3, 13) :
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else :
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Attaching registers the block for unlink at exit (Python < 3.13), only the owner may unlink it.
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=self.shm.buf)
+
+        if self.owner :
+            self.header[:] = [SHM_MAGIC, rows, cols, 0, -1, 0, num_bytes, 0]
+        elif self.header[MAGIC] != SHM_MAGIC :
+            raise ValueError('Shared memory %s is not a cgol grid buffer' % name)
+
+        self.name = self.shm.name
+        self.rows = int(self.header[ROWS])
+        self.cols = int(self.header[COLS])
+        self.num_bytes = int(self.header[NUM_BYTES])
+
+        self.data = np.ndarray((self.shm.size - HEADER_BYTES,), dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_BYTES)
+
+        self.read_gen = -1 # Generation of the last consistent read
+        self.retries = 0   # Reads retried on a concurrent write
+
+        self.frame = np.empty_like(self.data) # Snapshot served to the next read_tcm_block
+        self.pinned = False
+
+    #------------------------------------------------------------------------------------
+
+    # Latest published generation (-1 before the first write)
+    def gen(self):
+        return int(self.header[GEN])
+
+    def closed(self):
+        return bool(self.header[CLOSED])
+
+    #------------------------------------------------------------------------------------
+
+    # Publish grid bytes of generation gen (single writer)
+    def write(self, buf, gen):
+
+        self.header[SEQ] += 1 # Odd, write in progress
+        self.data[:self.num_bytes] = np.frombuffer(buf, dtype=np.uint8, count=self.num_bytes)
+        self.header[GEN] = gen
+        self.header[SEQ] += 1 # Even, frame complete
+
+    #------------------------------------------------------------------------------------
+
+    # Consistent copy of the grid bytes (padded to whole words) into out, returns its generation
+    def read_into(self, out):
+
+        while True :
+            seq = self.header[SEQ]
+            if seq & 1 :
+                self.retries += 1
+                time.sleep(0)
+                continue
+            out[:] = self.data
+            gen = self.header[GEN]
+            if self.header[SEQ] == seq :
+                self.read_gen = int(gen)
+                return self.read_gen
+            self.retries += 1
+
+    #------------------------------------------------------------------------------------
+
+    # Consistent dense int grid copy, returns (gen, grid)
+    def read_grid(self):
+
+        buf = np.empty_like(self.data)
+        gen = self.read_into(buf)
+        bits = np.unpackbits(buf, bitorder='little')[:self.rows*self.cols]
+
+        return gen, bits.reshape(self.rows, self.cols).astype(int)
+
+    #------------------------------------------------------------------------------------
+
+    # Wait for a generation newer than last_gen, returns it (None on timeout or when closed)
+    def wait(self, last_gen, timeout=1.0, poll_sec=0.001):
+
+        end_time = time.perf_counter() + timeout
+        while time.perf_counter() < end_time :
+            gen = self.gen()
+            if gen > last_gen :
+                return gen
+            if self.closed() :
+                return None
+            time.sleep(poll_sec)
+
+        return None
+
+    #------------------------------------------------------------------------------------
+
+    # Consistent snapshot of the latest frame, served by the next read_tcm_block, returns its generation
+    def snapshot(self):
+
+        gen = self.read_into(self.frame)
+        self.pinned = True
+
+        return gen
+
+    #------------------------------------------------------------------------------------
+
+    # k5s session interface (see cgol_animate_shared.read_grid_bytes), grid bytes from address 0.
+    # Returns the pinned snapshot if any, otherwise reads the latest frame.
+    def read_tcm_block(self, mem_id, addr, num_words):
+
+        if not self.pinned :
+            self.read_into(self.frame)
+        self.pinned = False
+
+        return self.frame.view('<u4')[:num_words].copy()
+
+    #------------------------------------------------------------------------------------
+
+    # Owner: mark closed (attached readers stop waiting), then release and unlink
+    def close(self):
+
+        if self.owner :
+            self.header[CLOSED] = 1
+
+        del self.header, self.data
+        self.shm.close()
+
+        if self.owner :
+            self.shm.unlink()
@@ -0,0 +1,97 @@
+import argparse
+import sys
+from cgol_shm_grid import cgol_shm_grid
+
+#------------------------------------------------------------------------------------
+
+# Invocation Example:
+# Target side viewer created with shm_name='cgol_t0' (cgol_pygame_animate / cgol_terminal_animate), then:
+# Cloud: python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_shm_view.py cgol_t0 -view pygame
+#        python $MY_K5_PROJ/sw/apps/cgol_shared_lib/cgol_shm_view.py cgol_t0 -view check -pic cgol_64x64_edna -wrap
+
+# Out-of-process viewer / checker of a shared memory grid buffer (cgol_shm_grid).
+# The viewer classes read back from the attached buffer (as their k5s session) instead of the target,
+# each newly published generation is drawn, until the readback side closes the buffer.
+# The check mode waits for the last generation and checks it against the reference model.
+
+#------------------------------------------------------------------------------------
+
+def view(shm_grid, args):
+
+    if args.view == 'pygame' :
+        from cgol_pygame_animate import cgol_pygame_animate
+        viewer = cgol_pygame_animate(shm_grid.rows, shm_grid.cols, 0, shm_grid, 0)
+    else :
+        from cgol_terminal_animate import cgol_terminal_animate
+        viewer = cgol_terminal_animate(shm_grid.rows, shm_grid.cols, 0, 0, shm_grid, half_block=args.half_block)
+
+    last_gen = -1
+    while True :
+        gen = shm_grid.wait(last_gen)
+        if gen is None :
+            if shm_grid.closed() :
+                break
+            continue
+        gen = shm_grid.snapshot() # Latest consistent frame (may be newer than waited for), read back by the viewer
+        if args.view == 'pygame' :
+            viewer.display_grid(gen, False, True, '')
+        else :
+            viewer.display_grid(gen)
+        last_gen = gen
+
+    if args.view == 'terminal' :
+        viewer.animate_terminate()
+
+    print('Viewed up to generation %d (%d torn reads retried)' % (last_gen, shm_grid.retries))
+
+#------------------------------------------------------------------------------------
+
+def check(shm_grid, args):
+
+    import cgol_animate_ref as sar
+    from cgol_animate_shared import Object
+
+    last_gen = -1
+    while not shm_grid.closed() :
+        gen = shm_grid.wait(last_gen)
+        if gen is not None :
+            last_gen = gen
+
+    gen, grid = shm_grid.read_grid()
+
+    ref_args = Object()
+    ref_args.pic    = args.pic
+    ref_args.itr    = gen
+    ref_args.fps    = 10
+    ref_args.wrap   = args.wrap
+    ref_args.fftl   = True
+    ref_args.engine = args.engine
+    ref_args.cycle  = 'brent'
+    ref_args.rule   = args.rule # The target runs B3/S23, not the pattern RLE rule
+
+    ref = sar.cgol_animate(ref_args)
+    ref.check_grid(grid)
+
+    return ref.check_ok
+
+#----------------------------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    ap = argparse.ArgumentParser(description='Cgol Shared Memory Viewer',formatter_class=argparse.RawTextHelpFormatter)
+    ap.add_argument('name', metavar='<shm_name>', type=str, help='Shared memory grid buffer name')
+    ap.add_argument('-view', metavar='<mode>', type=str, default='pygame', choices=['pygame','terminal','check'],
+                    help='pygame or terminal viewer, or check of the last generation')
+    ap.add_argument('-half_block', action='store_true', help='Terminal half block mode (two grid rows per line)')
+    ap.add_argument('-pic', metavar='<inpat_name>', type=str, default=None, help='Input pattern name (check mode)')
+    ap.add_argument('-wrap', action='store_true', help='Wrap Mode (check mode)')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default='B3/S23', help='Life-like rule of the target (check mode)')
+    ap.add_argument('-engine', metavar='<engine>', type=str, default='swar', choices=['conv','swar','hashlife','sparse','lut'], help='Reference stepping engine (check mode)')
+    args = ap.parse_args()
+
+    shm_grid = cgol_shm_grid(name=args.name)
+
+    if args.view == 'check' :
+        sys.exit(0 if check(shm_grid, args) else 1)
+    else :
+        view(shm_grid, args)
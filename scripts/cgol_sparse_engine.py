@@ -0,0 +1,180 @@
+import numpy as np
+from cgol_bit_grid import cgol_bit_grid, bit_grid_from_dense
+from cgol_rule import get_rule
+
+#------------------------------------------------------------------------------------
+
+# Sparse active-tile Game of Life engine, for a few objects in a mostly empty field.
+#
+# The grid is covered by tile x tile cell tiles. Only active tiles are recomputed: tiles that
+# changed in the last generation plus their 8 neighbour tiles (wrapping on a torus), any other
+# tile can not change. All active tiles are gathered at once into (K, tile+2, tile+2) windows
+# (one halo cell around each tile), stepped together and scattered back.
+# When more than max_active of the tiles are active a dense step is done instead,
+# always for rules giving birth on empty neighborhoods (B0), where any tile can change.
+#
+# The active tile set belongs to the last state returned by step. Stepping any other state
+# (e.g. cycle verification copies) starts with a dense step, so results always match the dense engine.
+
+#------------------------------------------------------------------------------------
+
+class cgol_sparse_engine :
+
+    def __init__(self, rows, cols, wrap, tile=16, max_active=0.5, rule=None):
+
+        self.rows = rows
+        self.cols = cols
+        self.wrap = wrap
+        self.tile = tile
+        self.rule = get_rule(rule)
+        self.max_active = -1 if self.rule.births_on_empty else max_active
+
+        self.tile_rows = (rows + tile - 1) // tile
+        self.tile_cols = (cols + tile - 1) // tile
+
+        # Per tile window row / column indexes (halo included)
+        self.win_rows = self.window_index(self.tile_rows, rows)
+        self.win_cols = self.window_index(self.tile_cols, cols)
+
+        # Per tile cell row / column indexes and validity (last tiles may be partial)
+        self.cell_rows = self.win_rows[:, 1:-1]
+        self.cell_cols = self.win_cols[:, 1:-1]
+        self.valid_rows = (np.arange(self.tile_rows)[:, None] * tile + np.arange(tile)[None, :]) < rows
+        self.valid_cols = (np.arange(self.tile_cols)[:, None] * tile + np.arange(tile)[None, :]) < cols
+
+        self.last_state = None  # Last state returned by step
+        self.active = None      # Its active tiles mask (tile_rows, tile_cols)
+
+        self.sparse_steps = 0
+        self.dense_steps = 0
+
+    #------------------------------------------------------------------------------------
+
+    # (num_tiles, tile+2) grid indexes of each tile window
+    def window_index(self, num_tiles, size):
+
+        idx = np.arange(num_tiles)[:, None] * self.tile + np.arange(-1, self.tile + 1)[None, :]
+
+        if self.wrap :
+            return idx % size
+
+        # Outside the grid (non-wrap) points to the always zero extra cell at index size
+        return np.where((idx >= 0) & (idx < size), idx, size)
+
+    #------------------------------------------------------------------------------------
+
+    def stats(self):
+        return {'sparse_steps' : self.sparse_steps,
+                'dense_steps'  : self.dense_steps,
+                'active_tiles' : int(self.active.sum()) if self.active is not None else 0,
+                'num_tiles'    : self.tile_rows * self.tile_cols}
+
+    #------------------------------------------------------------------------------------
+
+    # Engine interface, state is a dense uint8 grid with one extra zero row and column
+    # (the outside of a non-wrap grid for the window gathers)
+    def pack(self, grid):
+
+        if isinstance(grid, cgol_bit_grid) :
+            grid = grid.to_dense(np.uint8)
+
+        state = np.zeros((self.rows + 1, self.cols + 1), dtype=np.uint8)
+        state[:self.rows, :self.cols] = grid
+
+        return state
+
+    def unpack(self, state):
+        return state[:self.rows, :self.cols].astype(int)
+
+    def unpack_bits(self, state):
+        return bit_grid_from_dense(state[:self.rows, :self.cols])
+
+    #------------------------------------------------------------------------------------
+
+    # Next generation of the center of each window (K, h+2, w+2) -> (K, h, w)
+    def life(self, win):
+
+        index = (win[:, :-2, :-2] + win[:, :-2, 1:-1] + win[:, :-2, 2:] +
+                 win[:, 1:-1, :-2] + 9 * win[:, 1:-1, 1:-1] + win[:, 1:-1, 2:] +
+                 win[:, 2:, :-2]  + win[:, 2:, 1:-1]  + win[:, 2:, 2:])
+
+        return self.rule.lut[index]
+
+    #------------------------------------------------------------------------------------
+
+    # Tiles with any changed cell, from a changed cells mask of the grid
+    def changed_tiles(self, changed):
+
+        padded = np.zeros((self.tile_rows * self.tile, self.tile_cols * self.tile), dtype=bool)
+        padded[:self.rows, :self.cols] = changed
+
+        return padded.reshape(self.tile_rows, self.tile, self.tile_cols, self.tile).any(axis=(1, 3))
+
+    #------------------------------------------------------------------------------------
+
+    # Changed tiles and their 8 neighbour tiles
+    def dilate(self, tiles):
+
+        if self.wrap :
+            rows_or = tiles | np.roll(tiles, 1, axis=0) | np.roll(tiles, -1, axis=0)
+            return rows_or | np.roll(rows_or, 1, axis=1) | np.roll(rows_or, -1, axis=1)
+
+        rows_or = tiles.copy()
+        rows_or[1:]  |= tiles[:-1]
+        rows_or[:-1] |= tiles[1:]
+        active = rows_or.copy()
+        active[:, 1:]  |= rows_or[:, :-1]
+        active[:, :-1] |= rows_or[:, 1:]
+
+        return active
+
+    #------------------------------------------------------------------------------------
+
+    def step_dense(self, x):
+
+        grid = x[:self.rows, :self.cols]
+        padded = np.pad(grid, 1, mode='wrap') if self.wrap else np.pad(grid, 1)
+
+        new = np.zeros_like(x)
+        new[:self.rows, :self.cols] = self.life(padded[None])[0]
+
+        self.dense_steps += 1
+        return new, self.changed_tiles(new[:self.rows, :self.cols] != grid)
+
+    #------------------------------------------------------------------------------------
+
+    def step_sparse(self, x, active):
+
+        tr, tc = np.nonzero(active)
+
+        win = x[self.win_rows[tr][:, :, None], self.win_cols[tc][:, None, :]]
+        old = win[:, 1:-1, 1:-1]
+        new_tiles = self.life(win)
+
+        # Scatter valid cells of the stepped tiles into a copy of the grid
+        valid = self.valid_rows[tr][:, :, None] & self.valid_cols[tc][:, None, :]
+        cell_rows = np.broadcast_to(self.cell_rows[tr][:, :, None], valid.shape)[valid]
+        cell_cols = np.broadcast_to(self.cell_cols[tc][:, None, :], valid.shape)[valid]
+
+        new = x.copy()
+        new[cell_rows, cell_cols] = new_tiles[valid]
+
+        changed = np.zeros((self.tile_rows, self.tile_cols), dtype=bool)
+        changed[tr, tc] = ((new_tiles != old) & valid).any(axis=(1, 2))
+
+        self.sparse_steps += 1
+        return new, changed
+
+    #------------------------------------------------------------------------------------
+
+    def step(self, x):
+
+        if (x is self.last_state) and (self.active.mean() <= self.max_active) :
+            new, changed = self.step_sparse(x, self.active)
+        else : # Unknown activity (not the last returned state) or too active
+            new, changed = self.step_dense(x)
+
+        self.last_state = new
+        self.active = self.dilate(changed)
+
+        return new
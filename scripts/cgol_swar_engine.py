@@ -0,0 +1,200 @@
+import numpy as np
+from cgol_bit_grid import cgol_bit_grid
+from cgol_rule import get_rule
+
+#------------------------------------------------------------------------------------
+
+# Bit-packed SWAR (SIMD Within A Register) Game of Life engine.
+#
+# Each grid row is stored as a vector of uint64 words, 1 bit per cell,
+# column c at bit (c%64) of word (c//64), same LSB-first layout as sw/bit_array.h.
+# A generation is computed with bitwise full-adder logic across whole rows,
+# so a single numpy operation processes 64 cells per word for all rows at once.
+#
+# Conway's rule (B3/S23) is a fixed expression of the count bits. Other rules (cgol_rule) OR
+# together one equality term of the 4 count bits per neighbor count in the rule's lookup table,
+# masked by the cell state for counts that only give birth or only survive.
+
+#------------------------------------------------------------------------------------
+
+class cgol_swar_engine :
+
+    def __init__(self, rows, cols, wrap, rule=None):
+
+        self.rows = rows
+        self.cols = cols
+        self.wrap = wrap
+        self.rule = get_rule(rule)
+
+        # (neighbor count, born, survives) of counts with a live next state
+        self.rule_terms = [(n, bool(self.rule.lut[n]), bool(self.rule.lut[9 + n])) for n in range(9)
+                           if self.rule.lut[n] or self.rule.lut[9 + n]]
+
+        self.words_per_row = (cols + 63) // 64
+
+        self.last_word = (cols - 1) // 64                # Word holding the last column
+        self.last_bit  = np.uint64((cols - 1) % 64)      # Bit position of the last column in that word
+
+        self.ONE = np.uint64(1)
+        self.MSB = np.uint64(63)
+
+        # Mask of valid (non padding) bits per word, applied after each generation.
+        self.valid_mask = np.full(self.words_per_row, np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+        if cols % 64 != 0 :
+            self.valid_mask[-1] = (self.ONE << np.uint64(cols % 64)) - self.ONE
+
+    #------------------------------------------------------------------------------------
+
+    # Pack a dense 0/1 grid (or cgol_bit_grid, same row layout) into (rows, words_per_row) uint64 words.
+    def pack(self, grid):
+
+        if isinstance(grid, cgol_bit_grid) :
+            return grid.words().astype(np.uint64)
+
+        packed_bytes = np.packbits(np.asarray(grid, dtype=np.uint8), axis=1, bitorder='little')
+        padded = np.zeros((self.rows, self.words_per_row * 8), dtype=np.uint8)
+        padded[:, :packed_bytes.shape[1]] = packed_bytes
+
+        return padded.view('<u8').astype(np.uint64)
+
+    #------------------------------------------------------------------------------------
+
+    # Unpack uint64 words back to a dense 0/1 grid (dtype=int as used by the checker).
+    def unpack(self, packed):
+
+        packed_bytes = np.ascontiguousarray(packed, dtype='<u8').view(np.uint8)
+        bits = np.unpackbits(packed_bytes, axis=1, bitorder='little')[:, :self.cols]
+
+        return bits.astype(int)
+
+    #------------------------------------------------------------------------------------
+
+    # Unpack uint64 words to a cgol_bit_grid (no dense copy, for large grids).
+    def unpack_bits(self, packed):
+        return cgol_bit_grid(self.rows, self.cols, np.ascontiguousarray(packed, dtype='<u8').view(np.uint8))
+
+    #------------------------------------------------------------------------------------
+
+    # Shift rows so each cell holds its west (col-1) neighbour.
+    def west(self, x):
+
+        shifted = x << self.ONE
+        shifted[:, 1:] |= x[:, :-1] >> self.MSB    # carry across word boundary
+
+        if self.wrap : # column 0 west neighbour is the last column
+            shifted[:, 0] |= (x[:, self.last_word] >> self.last_bit) & self.ONE
+
+        return shifted
+
+    #------------------------------------------------------------------------------------
+
+    # Shift rows so each cell holds its east (col+1) neighbour.
+    def east(self, x):
+
+        shifted = x >> self.ONE
+        shifted[:, :-1] |= x[:, 1:] << self.MSB    # carry across word boundary
+
+        if self.wrap : # last column east neighbour is column 0
+            shifted[:, self.last_word] |= (x[:, 0] & self.ONE) << self.last_bit
+
+        return shifted
+
+    #------------------------------------------------------------------------------------
+
+    # Shift whole rows, returning (north, south) neighbour rows.
+    def north_south(self, x):
+
+        if self.wrap :
+            return np.roll(x, 1, axis=0), np.roll(x, -1, axis=0)
+
+        north = np.zeros_like(x)
+        south = np.zeros_like(x)
+        north[1:]  = x[:-1]
+        south[:-1] = x[1:]
+
+        return north, south
+
+    #------------------------------------------------------------------------------------
+
+    # Next generation from the north/south row triple sums (n, s), middle row west+east sum (m) and cells x.
+    def next_gen(self, n0, s0, n1, s1, m0, m1, x):
+
+        # north + south (0..6)
+        a0 = n0 ^ s0
+        c0 = n0 & s0
+        a1 = n1 ^ s1 ^ c0
+        a2 = (n1 & s1) | (c0 & (n1 ^ s1))
+
+        # + middle (0..8)
+        b0 = a0 ^ m0
+        k0 = a0 & m0
+        b1 = a1 ^ m1 ^ k0
+        k1 = (a1 & m1) | (k0 & (a1 ^ m1))
+        b2 = a2 ^ k1
+
+        if self.rule.is_conway : # Alive on 3 neighbors, or on 2 neighbors if currently alive (count 8 has b0..b2 clear).
+            return b1 & ~b2 & (b0 | x) & self.valid_mask
+
+        return self.rule_gen(b0, b1, b2, a2 & k1, x)
+
+    #------------------------------------------------------------------------------------
+
+    # Next generation of a generic rule from the neighbor count bits b0..b3 and cells x.
+    def rule_gen(self, b0, b1, b2, b3, x):
+
+        bits = (b0, b1, b2)
+        inv  = (~b0, ~b1, ~b2)
+
+        alive = np.zeros_like(x)
+        for n, born, survives in self.rule_terms :
+            if n == 8 : # The only count with b3 set (counts 9..15 do not occur)
+                eq = b3
+            else :
+                eq = (bits[0] if n & 1 else inv[0]) & (bits[1] if n & 2 else inv[1]) & (bits[2] if n & 4 else inv[2])
+                if n == 0 : # Tell 0 from 8
+                    eq = eq & ~b3
+            if not survives :
+                eq = eq & ~x
+            elif not born :
+                eq = eq & x
+            alive |= eq
+
+        return alive & self.valid_mask
+
+    #------------------------------------------------------------------------------------
+
+    # Compute next generation of packed grid.
+    def step(self, x):
+
+        w = self.west(x)
+        e = self.east(x)
+
+        # Middle row: west + east (0..2)
+        m0 = w ^ e
+        m1 = w & e
+
+        # Full row triple sums: west + self + east (0..3), later shifted to serve as north and south rows.
+        h0 = m0 ^ x
+        h1 = m1 | (m0 & x)
+
+        n0, s0 = self.north_south(h0)
+        n1, s1 = self.north_south(h1)
+
+        return self.next_gen(n0, s0, n1, s1, m0, m1, x)
+
+    #------------------------------------------------------------------------------------
+
+    # Compute next generation of the inner rows of a band, whose first and last rows are
+    # halo rows (neighbour band rows, torus wrapped rows or zero rows), as used by cgol_tiled_engine.
+    def step_band(self, x):
+
+        w = self.west(x)
+        e = self.east(x)
+
+        m0 = w ^ e
+        m1 = w & e
+
+        h0 = m0 ^ x
+        h1 = m1 | (m0 & x)
+
+        return self.next_gen(h0[:-2], h0[2:], h1[:-2], h1[2:], m0[1:-1], m1[1:-1], x[1:-1])
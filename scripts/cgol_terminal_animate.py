@@ -2,7 +2,7 @@ import time
 import sys
 import os
 import random
-from colorama import deinit,Fore, Cursor
+from colorama import deinit,Fore, Back, Cursor
 from colorama import init as colorama_init
 import numpy as np
 
@@ -14,12 +14,13 @@ from k5_common import *
 
 sys.path.append(os.environ['K5_XBOX_ENV']+'/aw/apps/cgol_shared_lib')
 import cgol_animate_shared as sas
+from cgol_shm_grid import cgol_shm_grid
 
 #------------------------------------------------------
 
 class cgol_terminal_animate:
       
-    def __init__(self, rows, cols, grid_soc_addr, thread_id, k5s):
+    def __init__(self, rows, cols, grid_soc_addr, thread_id, k5s, dirty=False, buffered=True, half_block=False, shm_name=None):
     
       self.rows = rows
       self.cols = cols 
@@ -29,11 +30,42 @@ class cgol_terminal_animate:
       
       self.crnt_grid = np.zeros((self.rows,self.cols))
       self.next_grid = np.zeros((self.rows,self.cols))
+      
+      self.dirty = dirty # Incremental readback, only changed rows are decoded and redrawn
+      self.prev_grid_chunks = None
+      
+      # Read back frames are also published to a shared memory grid buffer (out-of-process viewers / checker)
+      self.shm_grid = cgol_shm_grid(rows, cols, shm_name) if shm_name is not None else None
 
       self.on_char = Fore.GREEN + '\u25AE' # solid square
       self.off_char = Fore.BLUE + '\u22C5' # (dot-operator)
       self.step_time = 0.01 # Seconds
       
+      # Buffered mode: changed cells found by a vectorized mask, horizontal runs coalesced,
+      # the whole frame is emitted by a single write and flush.
+      # Half block mode (buffered only): two grid rows per character line, top row cell as
+      # the foreground and bottom row cell as the background color of a '\u2580' (upper half block),
+      # a space of the background color when both cells are equal.
+      # Glyphs are (foreground, background, char), None when the color does not matter. The terminal
+      # foreground and background are tracked separately, only a color that changes is emitted.
+      self.buffered = buffered
+      self.half_block = half_block and buffered
+      
+      if self.half_block :
+        self.glyphs = [(None,       Back.BLUE,  ' '),       # top off, bottom off
+                       (Fore.BLUE,  Back.GREEN, '\u2580'),  # top off, bottom on
+                       (Fore.GREEN, Back.BLUE,  '\u2580'),  # top on,  bottom off
+                       (None,       Back.GREEN, ' ')]       # top on,  bottom on
+        self.disp_rows = (self.rows + 1) // 2
+      else :
+        self.glyphs = [(Fore.BLUE, None, '\u22C5'), (Fore.GREEN, None, '\u25AE')]
+        self.disp_rows = self.rows
+      
+      self.term_fore = None # Current terminal colors, None when unknown
+      self.term_back = None
+      
+      self.crnt_codes = np.zeros((self.disp_rows,self.cols), dtype=np.uint8) # Displayed glyph index per character cell
+      
       print('\033[?25l', end="") # Needed to hide the blinking cursor.
           
       colorama_init()
@@ -54,6 +86,12 @@ class cgol_terminal_animate:
     def init_display_grid(self):
     
       self.clear_screen() 
+      self.term_fore = None
+      self.term_back = None
+      
+      if self.buffered :
+        self.write_frame(self.render_rows(self.crnt_codes, range(self.disp_rows)))
+        return 1 # Indicates 'done'
     
       for row in range(self.rows):
         for col in range(self.cols):    
@@ -62,6 +100,76 @@ class cgol_terminal_animate:
       return 1 # Indicates 'done'
 
     #-------------------------------------------------------------------------------------    
+
+    # Grid to glyph index per character cell of character lines disp_rows (all lines when None)
+    def grid_codes(self, grid, disp_rows=None):
+    
+      if disp_rows is None :
+        disp_rows = np.arange(self.disp_rows)
+        
+      if not self.half_block :
+        return (grid[disp_rows] == 1).astype(np.uint8)
+        
+      top = (grid[2*disp_rows] == 1).astype(np.uint8)
+      bottom = (grid[np.minimum(2*disp_rows+1, self.rows-1)] == 1).astype(np.uint8)
+      bottom[2*disp_rows+1 >= self.rows] = 0 # odd rows count, last line bottom is a dead row
+      return 2*top + bottom
+
+    #-------------------------------------------------------------------------------------    
+
+    # Escape sequence string for cells [row, cols] of codes, a cursor position per run of adjacent columns
+    def render_runs(self, codes, row, cols):
+    
+      out = []
+      for run in np.split(cols, np.flatnonzero(np.diff(cols) > 1) + 1) :
+        out.append(Cursor.POS(int(run[0]) + 1, row + 1)) # Notice "Cursor" first non-spaced col,row is 1,1 not 0,0
+        for code in codes[row, run] :
+          fore, back, char = self.glyphs[code]
+          if (fore is not None) and (fore != self.term_fore) :
+            out.append(fore)
+            self.term_fore = fore
+          if (back is not None) and (back != self.term_back) :
+            out.append(back)
+            self.term_back = back
+          out.append(char)
+          
+      return ''.join(out)
+
+    #-------------------------------------------------------------------------------------    
+
+    # Escape sequence string redrawing full character lines
+    def render_rows(self, codes, rows):
+      all_cols = np.arange(self.cols)
+      return ''.join(self.render_runs(codes, row, all_cols) for row in rows)
+
+    #-------------------------------------------------------------------------------------    
+
+    def write_frame(self, frame_str):
+      sys.stdout.write(frame_str)
+      sys.stdout.flush()
+
+    #-------------------------------------------------------------------------------------    
+    
+    # Buffered display of next_grid, only changed character cells of the character lines
+    # holding changed_rows (grid rows) are emitted
+    def display_grid_buffered(self,gen,changed_rows) :
+    
+        changed_rows = np.asarray(changed_rows, dtype=int)
+        disp_rows = np.unique(changed_rows // 2) if self.half_block else changed_rows
+        
+        out = []
+        if len(disp_rows) > 0 :
+          next_codes = self.grid_codes(self.next_grid, disp_rows)
+          changed = next_codes != self.crnt_codes[disp_rows]
+          for i in np.flatnonzero(changed.any(axis=1)) :
+            self.crnt_codes[disp_rows[i]] = next_codes[i]
+            out.append(self.render_runs(self.crnt_codes, disp_rows[i], np.flatnonzero(changed[i])))
+          
+        out.append(Cursor.POS(1, self.disp_rows + 2) + Back.RESET + ('Generation %d\n' % gen))
+        self.term_back = Back.RESET
+        self.write_frame(''.join(out))
+
+    #-------------------------------------------------------------------------------------    
  
     # Clear screen
     def clear_screen(self):
@@ -72,15 +180,22 @@ class cgol_terminal_animate:
     # Print the grid array
     def display_grid(self,gen) :
     
-        sas.get_grid(self,self.next_grid)
+        if self.dirty :
+           self.next_grid[:] = self.crnt_grid # get_grid_dirty decodes only changed rows over previous frame
+           changed_rows = np.flatnonzero(sas.get_grid_dirty(self,self.next_grid,gen))
+        else :
+           sas.get_grid(self,self.next_grid,gen)
+           changed_rows = range(self.rows)
 
-        for row in range(self.rows):
-          for col in range(self.cols):
-            if (self.next_grid[row,col] != self.crnt_grid[row,col])   :
-               char_type = self.off_char if (self.next_grid[row,col]==0) else self.on_char            
-               self.update_cell(row, col, char_type)
-        
-        self.update_cell(self.rows+1,0, ('Generation %d\n'%gen))
+        if self.buffered :
+          self.display_grid_buffered(gen, changed_rows)
+        else :
+          for row in changed_rows:
+            for col in np.flatnonzero(self.next_grid[row] != self.crnt_grid[row]):
+                 char_type = self.off_char if (self.next_grid[row,col]==0) else self.on_char            
+                 self.update_cell(row, col, char_type)
+          
+          self.update_cell(self.rows+1,0, ('Generation %d\n'%gen))
         
         # Swap current and next grid np references
         prev_crnt_grid = self.crnt_grid        
@@ -96,8 +211,12 @@ class cgol_terminal_animate:
        deinit()
        
        # Move cursor below grid to avoid overwriting
-       sys.stdout.write(Cursor.POS(1, self.rows + 2))
+       sys.stdout.write(Cursor.POS(1, self.disp_rows + 2))
        
        print('\033[?25h', end="") # Turn on back the blinking cursor.
+       
+       if self.shm_grid is not None : # Out-of-process viewers / checker stop
+          self.shm_grid.close()
+          self.shm_grid = None
 
 
@@ -0,0 +1,190 @@
+import numpy as np
+import concurrent.futures
+
+#------------------------------------------------------------------------------------
+
+# Tiled multi-core stepping over a band capable engine (cgol_swar_engine).
+#
+# The packed grid is split into horizontal bands, each band is stepped with one halo row
+# above and below it (step_band) on a thread pool, numpy releasing the GIL for the bitwise
+# row operations. Interior band halos are plain views of the neighbour band rows of the
+# current generation (no copy); the first and last bands get the opposite edge row on a torus
+# (wrap) or a zero row, assembled into a small per band buffer.
+# Each band writes its rows straight into the next generation buffer.
+#
+# Temporal blocking (gens_per_exchange k > 1, step_n): each band is cut with k halo rows on each
+# side and advanced k generations locally, the window shrinking by one row per side and generation,
+# before the next generation buffer is assembled (one halo exchange per k generations).
+# Bands are sized so a band window and the band engine temporaries stay in the L2 cache, k is chosen
+# from the window (auto_block), so grids far larger than the cache are stepped k generations per pass.
+# Non-wrap windows reaching the grid edge are extended with a dead row each generation instead.
+
+#------------------------------------------------------------------------------------
+
+BAND_WORK_ARRAYS = 24 # Band sized temporaries of a cgol_swar_engine band step
+
+#------------------------------------------------------------------------------------
+
+# L2 (else largest reported) cache size in bytes, default when not available
+def cache_bytes(default=1 << 20):
+
+    sizes = {}
+    for index in range(8) :
+        try :
+            path = '/sys/devices/system/cpu/cpu0/cache/index%d/' % index
+            with open(path + 'level') as f :
+                level = int(f.read())
+            with open(path + 'size') as f :
+                size = f.read().strip()
+        except (OSError, ValueError) :
+            continue
+        scale = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}.get(size[-1:], 1)
+        sizes[level] = int(size.rstrip('KMG')) * scale
+
+    return sizes.get(2, max(sizes.values()) if sizes else default)
+
+#------------------------------------------------------------------------------------
+
+# (band rows, gens_per_exchange) of a rows x row_bytes grid, (None, 1) when the whole grid fits in the cache.
+# A window of band rows plus k halo rows per side fits in the cache, k is about a tenth of it
+# (about 10 to 20% of rows recomputed in halos).
+def auto_block(rows, row_bytes, cache_size):
+
+    window_rows = cache_size // (row_bytes * BAND_WORK_ARRAYS)
+    if window_rows >= rows :
+        return None, 1
+
+    k = max(1, window_rows // 10)
+    return max(2 * k, window_rows - 2 * k), k
+
+#------------------------------------------------------------------------------------
+
+class cgol_tiled_engine :
+
+    def __init__(self, base, num_threads, min_band_rows=16, gens_per_exchange=1):
+
+        self.base = base
+        self.rows = base.rows
+        self.cols = base.cols
+        self.wrap = base.wrap
+
+        self.num_threads = num_threads
+        self.num_bands = max(1, min(num_threads, self.rows // min_band_rows))
+
+        # Temporal blocking, 0 chooses band size and gens_per_exchange from the cache size
+        if gens_per_exchange == 0 :
+            band_rows, gens_per_exchange = auto_block(self.rows, base.words_per_row * 8, cache_bytes())
+            if band_rows is not None :
+                self.num_bands = max(self.num_bands, -(-self.rows // band_rows))
+        self.gens_per_exchange = gens_per_exchange
+
+        edges = np.linspace(0, self.rows, self.num_bands + 1).astype(int)
+        self.bands = list(zip(edges[:-1], edges[1:]))
+
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.num_threads)
+
+    #------------------------------------------------------------------------------------
+
+    # Engine interface, state is the base engine state
+    def pack(self, grid):
+        return self.base.pack(grid)
+
+    def unpack(self, state):
+        return self.base.unpack(state)
+
+    def unpack_bits(self, state):
+        return self.base.unpack_bits(state)
+
+    #------------------------------------------------------------------------------------
+
+    # Band rows r0..r1-1 with their halo rows
+    def band_with_halo(self, x, r0, r1):
+
+        if (r0 > 0) and (r1 < self.rows) :
+            return x[r0-1:r1+1]
+
+        band = np.empty((r1 - r0 + 2,) + x.shape[1:], dtype=x.dtype)
+        band[1:-1] = x[r0:r1]
+
+        if r0 > 0 :
+            band[0] = x[r0-1]
+        elif self.wrap :
+            band[0] = x[-1]
+        else :
+            band[0] = 0
+
+        if r1 < self.rows :
+            band[-1] = x[r1]
+        elif self.wrap :
+            band[-1] = x[0]
+        else :
+            band[-1] = 0
+
+        return band
+
+    #------------------------------------------------------------------------------------
+
+    def step_band(self, x, new, r0, r1):
+        new[r0:r1] = self.base.step_band(self.band_with_halo(x, r0, r1))
+
+    #------------------------------------------------------------------------------------
+
+    def step(self, x):
+
+        if self.num_bands == 1 :
+            return self.base.step(x)
+
+        new = np.empty_like(x)
+        futures = [self.pool.submit(self.step_band, x, new, r0, r1) for r0, r1 in self.bands]
+        for future in futures :
+            future.result() # Re-raise band errors
+
+        return new
+
+    #------------------------------------------------------------------------------------
+
+    # Advance band rows r0..r1-1 num_gen generations from a window of num_gen halo rows per side
+    def step_band_n(self, x, new, r0, r1, num_gen):
+
+        top = r0 - num_gen
+        bottom = r1 + num_gen
+
+        if self.wrap :
+            band = x[np.arange(top, bottom) % self.rows]
+            top_edge = bottom_edge = False
+        else : # Beyond the grid edge cells stay dead
+            top_edge = top <= 0
+            bottom_edge = bottom >= self.rows
+            top = max(top, 0)
+            band = x[top:min(bottom, self.rows)]
+
+        dead_row = np.zeros((1,) + x.shape[1:], dtype=x.dtype)
+        for gen in range(num_gen) :
+            if top_edge :
+                band = np.concatenate((dead_row, band))
+            else : # The first window row is consumed
+                top += 1
+            if bottom_edge :
+                band = np.concatenate((band, dead_row))
+            band = self.base.step_band(band)
+
+        new[r0:r1] = band[r0-top:r1-top]
+
+    #------------------------------------------------------------------------------------
+
+    # Advance num_gen generations, one halo exchange (new grid buffer) per gens_per_exchange generations
+    def step_n(self, x, num_gen):
+
+        while num_gen > 0 :
+            k = min(num_gen, self.gens_per_exchange)
+            if k == 1 :
+                x = self.step(x)
+            else :
+                new = np.empty_like(x)
+                futures = [self.pool.submit(self.step_band_n, x, new, r0, r1, k) for r0, r1 in self.bands]
+                for future in futures :
+                    future.result()
+                x = new
+            num_gen -= k
+
+        return x
@@ -2,7 +2,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import argparse
-import os
+from cgol_pattern_loader import load_pattern, load_pattern_rule
+from cgol_rule import get_rule
+from cgol_bit_grid import downsample
 
 #------------------------------------------------------------------------
 
@@ -10,11 +12,12 @@ class cgol_torus_animate :
       
     def __init__(self):
     
-      self.GRID_MAX_H = 256
+      self.GRID_MAX_H = 256 # Max displayed torus faces per axis, larger grids are downsampled
       self.GRID_MAX_W = 256
       self.GRID_H = None
       self.GRID_W = None
       self.grid   = None
+      self.rule   = get_rule(None)
       self.surf   = None
       self.fig    = None
       self.ax     = None
@@ -31,7 +34,23 @@ class cgol_torus_animate :
  
     def step(self, grid):
         neighbors = self.count_neighbors(grid)
-        return (neighbors == 3) | ((grid == 1) & (neighbors == 2))
+        return self.rule.apply(grid, neighbors)
+
+    #--------------------------------------------------------------------
+    
+    # Grid as displayed, downsampled (any alive cell per block) to at most GRID_MAX_H x GRID_MAX_W
+    def disp_grid(self, grid):
+        m, n = grid.shape
+        factor = max(-(-m // self.GRID_MAX_H), -(-n // self.GRID_MAX_W))
+        if factor == 1 :
+            return grid
+        return downsample(grid, -(-m // factor), -(-n // factor))
+
+    #--------------------------------------------------------------------
+    
+    # RGBA color per cell, alive cells black
+    def cell_colors(self, grid):
+        return plt.cm.binary(grid.astype(float))
 
     #--------------------------------------------------------------------
     
@@ -56,8 +75,9 @@ class cgol_torus_animate :
         self.ax.axis('off')
         self.ax.set_box_aspect([1, 1, 1])
     
-        X, Y, Z = self.torus_coordinates(grid)
-        facecolors = plt.cm.binary(grid.astype(float))
+        disp_grid = self.disp_grid(grid)
+        X, Y, Z = self.torus_coordinates(disp_grid)
+        facecolors = self.cell_colors(disp_grid)
         self.surf = [self.ax.plot_surface(X, Y, Z, facecolors=facecolors,
                                 rstride=1, cstride=1, antialiased=False)]
                                 
@@ -69,13 +89,14 @@ class cgol_torus_animate :
     def update(self, _):
 
         self.grid = self.step(self.grid)
-        X, Y, Z = self.torus_coordinates(self.grid)
+        disp_grid = self.disp_grid(self.grid)
+        X, Y, Z = self.torus_coordinates(disp_grid)
     
         # Remove previous surface correctly
         self.surf[0].remove()
     
         # Add new surface
-        facecolors = plt.cm.binary(self.grid.astype(float))
+        facecolors = self.cell_colors(disp_grid)
         self.surf[0] = self.ax.plot_surface(X, Y, Z, facecolors=facecolors,
                                   rstride=1, cstride=1, antialiased=False)
         return self.surf
@@ -84,38 +105,9 @@ class cgol_torus_animate :
  
     def get_start_pic (self, args) :
     
-       K5_SW_APPS_PATH = os.environ["K5_SW_APPS"].replace('/c/','c:/')
-       pic_file = open(K5_SW_APPS_PATH + '/cgol_shared_lib/cgol_patterns/' + args.pic + '.txt','r')
-
-       self.grid = np.zeros((self.GRID_MAX_H, self.GRID_MAX_W), dtype=int)
-
-       total_elements = 0 
-       row_idx = 0
-       for orig_line_count, line in enumerate(pic_file) :
-         col_idx = 0
-         row_present = False
-         for p in line[:-1] : # exclude eol
-             if p in ['#','.'] :
-                 total_elements +=1
-                 row_present = True             
-                 if p=='#'  : 
-                    self.grid[row_idx][col_idx] = 1
-             col_idx+=1    
-             
-         if row_present:
-           row_idx+=1
-         
-       if len(line.split())>0 :
-         orig_line_count+=1
-                     
-       width = total_elements//orig_line_count
-                      
-       self.GRID_H = orig_line_count
-       self.GRID_W = width
-       
-       self.grid = self.grid[:self.GRID_H, :self.GRID_W]
-                 
-       pic_file.close()       
+       self.grid = load_pattern(args.pic)
+       self.GRID_H, self.GRID_W = self.grid.shape
+       self.rule = get_rule(args.rule if args.rule is not None else load_pattern_rule(args.pic))
 
 #-----------------------------------------------------------------------------------
 
@@ -123,6 +115,7 @@ if __name__ == "__main__":
 
     ap = argparse.ArgumentParser(description='Cgol Animate',formatter_class=argparse.RawTextHelpFormatter)
     ap.add_argument('pic',  metavar='<inpat_name>', default=None, type=str, help='Input pattern name')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default=None, help='Life-like rule in B/S notation (default the pattern RLE rule or B3/S23)')
     # ap.add_argument('-itr', metavar='<num_itr>' , type=int, default=0 , help='Number of iterations (generations)')  
     # ap.add_argument('-wrap' , action='store_true', help='Wrap Mode')  
     # ap.add_argument('-fftl' , action='store_true', help='fast forward to last')    
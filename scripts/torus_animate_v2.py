@@ -1,153 +1,125 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import PolyCollection
 import argparse
-import os
+import torus_animate
 from scipy.signal import convolve2d
 
 #------------------------------------------------------------------------
 
-class cgol_torus_animate :
+# Torus animation with a cached mesh, in place face color updates and offscreen rendering.
+# Grid loading, rule, downsampling and cell colors are shared with torus_animate.
+
+class cgol_torus_animate (torus_animate.cgol_torus_animate) :
       
     def __init__(self):
     
-      self.GRID_MAX_H = 256
-      self.GRID_MAX_W = 256
-      self.GRID_H = None
-      self.GRID_W = None
-      self.grid   = None
-      self.surf   = None
-      self.fig    = None
-      self.ax     = None
+      super().__init__()
+      self.face_shade = None
+      self.coords_cache = {} # (m, n, R, r) -> torus mesh X, Y, Z
     
-    #--------------------------------------------------------------------
-   
-    # --- Game of Life logic (toroidal) ---
-    def count_neighbors(self, grid):
-        return sum(np.roll(np.roll(grid, i, 0), j, 1)
-                   for i in [-1, 0, 1] for j in [-1, 0, 1]
-                   if not (i == 0 and j == 0))
-
     #-------------------------------------------------------------------- 
  
     def step(self, grid):
-        #neighbors = self.count_neighbors(grid)
-        #return (neighbors == 3) | ((grid == 1) & (neighbors == 2))
 
         kernel = np.array([[1, 1, 1],
-                           [1, 0, 1],
+                           [1, 9, 1],
                            [1, 1, 1]])
         
-        # Count neighbors using 2D convolution
+        # Rule lookup index 9*state + neighbors using 2D convolution
 
-        neighbors = convolve2d(self.grid, kernel, mode='same', boundary='wrap')
+        index = convolve2d(grid, kernel, mode='same', boundary='wrap')
         
-        # Apply Conway's Game of Life rules
-        birth = (self.grid == 0) & (neighbors == 3)
-        survive = (self.grid == 1) & ((neighbors == 2) | (neighbors == 3))
-        
-        # Return the next generation
-        return np.where(birth | survive, 1, 0)        
-
-
+        # Apply the rule, return the next generation
+        return self.rule.lut[index]
 
     #--------------------------------------------------------------------
     
     # --- Convert 2D grid to torus coordinates ---
+    # Geometry never changes, the mesh is computed once per grid shape and radii.
     def torus_coordinates(self, grid, R=3, r=2):
         m, n = grid.shape
-        theta = np.linspace(0, 2 * np.pi, m, endpoint=False)
-        phi = np.linspace(0, 2 * np.pi, n, endpoint=False)
-        theta, phi = np.meshgrid(theta, phi, indexing='ij')
+        key = (m, n, R, r)
+        if key not in self.coords_cache :
+            theta = np.linspace(0, 2 * np.pi, m, endpoint=False)
+            phi = np.linspace(0, 2 * np.pi, n, endpoint=False)
+            theta, phi = np.meshgrid(theta, phi, indexing='ij')
+        
+            X = (R + r * np.cos(phi)) * np.cos(theta)
+            Y = (R + r * np.cos(phi)) * np.sin(theta)
+            Z = r * np.sin(phi)
+            self.coords_cache[key] = (X, Y, Z)
+        return self.coords_cache[key]
+
+    #--------------------------------------------------------------------
     
-        X = (R + r * np.cos(phi)) * np.cos(theta)
-        Y = (R + r * np.cos(phi)) * np.sin(theta)
-        Z = r * np.sin(phi)
-        return X, Y, Z
+    # Per face colors of the surface: one face per grid cell except last row and column (rstride=cstride=1),
+    # multiplied by the lighting shade plot_surface applied to the initial surface.
+    def face_colors(self, grid):
+        colors = self.cell_colors(grid[:-1, :-1]).reshape(-1, 4)
+        colors[:, :3] *= self.face_shade
+        return colors
 
     #--------------------------------------------------------------------
     
     # --- Animate Game of Life on torus ---
-    def animate_game_on_torus(self, grid, frames=100, interval=200):
+    # out_file (.mp4 or .gif) renders the frames offscreen instead of displaying them.
+    def animate_game_on_torus(self, grid, frames=100, interval=200, out_file=None):
+        if out_file is not None :
+            plt.switch_backend('Agg')
+            
         self.fig = plt.figure(figsize=(8,6))
         self.ax = self.fig.add_subplot(111, projection='3d')
         self.ax.axis('off')
         self.ax.set_box_aspect([1, 1, 1])
     
-        X, Y, Z = self.torus_coordinates(grid)
-        facecolors = plt.cm.binary(grid.astype(float))
+        disp_grid = self.disp_grid(grid)
+        X, Y, Z = self.torus_coordinates(disp_grid)
+        
+        # Single surface, created with all cells dead to capture the per face lighting shade
+        facecolors = self.cell_colors(np.zeros(disp_grid.shape))
         self.surf = [self.ax.plot_surface(X, Y, Z, facecolors=facecolors,
                                 rstride=1, cstride=1, antialiased=False)]
+        # Base class colors are in face creation order (Poly3DCollection.get_facecolor is depth sorted)
+        self.face_shade = PolyCollection.get_facecolor(self.surf[0])[:, :3].copy()
+        self.surf[0].set_facecolor(self.face_colors(disp_grid))
                                 
         ani = FuncAnimation(self.fig, self.update, frames=frames, interval=interval, blit=False)
-        plt.show()
+        
+        if out_file is None :
+            plt.show()
+        else :
+            writer = 'ffmpeg' if out_file.endswith('.mp4') else 'pillow'
+            ani.save(out_file, writer=writer, fps=max(1, 1000 // interval))
+            print('Saved %d frames to %s' % (frames, out_file))
                             
     #--------------------------------------------------------------------
     
     def update(self, _):
 
         self.grid = self.step(self.grid)
-        X, Y, Z = self.torus_coordinates(self.grid)
-    
-        # Remove previous surface correctly
-        self.surf[0].remove()
     
-        # Add new surface
-        facecolors = plt.cm.binary(self.grid.astype(float))
-        self.surf[0] = self.ax.plot_surface(X, Y, Z, facecolors=facecolors,
-                                  rstride=1, cstride=1, antialiased=False)
+        # Update face colors only, geometry is unchanged
+        self.surf[0].set_facecolor(self.face_colors(self.disp_grid(self.grid)))
         return self.surf
 
 
-    
-    #------------------------------------------------------------------------------------
- 
-    def get_start_pic (self, args) :
-    
-       K5_SW_APPS_PATH = os.environ["K5_SW_APPS"].replace('/c/','c:/')
-       pic_file = open(K5_SW_APPS_PATH + '/cgol_shared_lib/cgol_patterns/' + args.pic + '.txt','r')
-
-       self.grid = np.zeros((self.GRID_MAX_H, self.GRID_MAX_W), dtype=int)
-
-       total_elements = 0 
-       row_idx = 0
-       for orig_line_count, line in enumerate(pic_file) :
-         col_idx = 0
-         row_present = False
-         for p in line[:-1] : # exclude eol
-             if p in ['#','.'] :
-                 total_elements +=1
-                 row_present = True             
-                 if p=='#'  : 
-                    self.grid[row_idx][col_idx] = 1
-             col_idx+=1    
-             
-         if row_present:
-           row_idx+=1
-         
-       if len(line.split())>0 :
-         orig_line_count+=1
-                     
-       width = total_elements//orig_line_count
-                      
-       self.GRID_H = orig_line_count
-       self.GRID_W = width
-       
-       self.grid = self.grid[:self.GRID_H, :self.GRID_W]
-                 
-       pic_file.close()       
-
 #-----------------------------------------------------------------------------------
 
 if __name__ == "__main__":
 
     ap = argparse.ArgumentParser(description='Cgol Animate',formatter_class=argparse.RawTextHelpFormatter)
     ap.add_argument('pic',  metavar='<inpat_name>', default=None, type=str, help='Input pattern name')
+    ap.add_argument('-rule', metavar='<rule>', type=str, default=None, help='Life-like rule in B/S notation (default the pattern RLE rule or B3/S23)')
     # ap.add_argument('-itr', metavar='<num_itr>' , type=int, default=0 , help='Number of iterations (generations)')  
     # ap.add_argument('-wrap' , action='store_true', help='Wrap Mode')  
     # ap.add_argument('-fftl' , action='store_true', help='fast forward to last')    
+    ap.add_argument('-frames', metavar='<num_frames>', type=int, default=100, help='Number of animation frames (generations)')
+    ap.add_argument('-interval', metavar='<msec>', type=int, default=200, help='Delay between frames in milliseconds')
+    ap.add_argument('-out', metavar='<file>', type=str, default=None, help='Render offscreen to .mp4 (ffmpeg) or .gif file instead of display')
     args = ap.parse_args()
   
     cta = cgol_torus_animate() 
     cta.get_start_pic(args)    
-    cta.animate_game_on_torus(cta.grid)
+    cta.animate_game_on_torus(cta.grid, frames=args.frames, interval=args.interval, out_file=args.out)